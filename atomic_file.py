@@ -0,0 +1,27 @@
+"""
+Atomic state-file writes - the data goes to a temp file that is then moved over the
+target, so a crash or a concurrent reader never sees a half-written file.
+"""
+
+import os
+import threading
+
+
+def atomic_write(path, data, permissions=None):
+    """Replace `path` with `data` (str or bytes). `permissions` are set before the file appears."""
+    # Unique per writer, so buyers in one process never replace each other's temp file
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        if isinstance(data, bytes):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+        if permissions is not None:
+            os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,185 @@
+"""
+Offline availability classifier - decides from raw event-page HTML whether the sale
+is pre-sale, on sale, sold out or an error page, without a browser.
+"""
+
+import re
+from dataclasses import dataclass
+from html import unescape
+
+PRE_SALE = "pre_sale"
+ON_SALE = "on_sale"
+SOLD_OUT = "sold_out"
+ERROR = "error"
+UNKNOWN = "unknown"
+
+STATUSES = (PRE_SALE, ON_SALE, SOLD_OUT, ERROR, UNKNOWN)
+
+# Matched case-insensitively against visible text
+PRE_SALE_MARKERS = ("ticket sale online starts on", "ticketverkauf startet am", "vorverkauf startet am")
+SOLD_OUT_MARKERS = ("sold out", "ausverkauft", "no tickets available", "keine tickets verfügbar")
+ERROR_PAGE_MARKERS = ("page not found", "service unavailable", "internal server error", "bad gateway",
+                      "too many requests", "maintenance", "wartungsarbeiten", "seite nicht gefunden")
+
+# Matched case-sensitively against button text, like the buy_button locators
+BUY_BUTTON_LABELS = ("Buy", "Purchase", "Get tickets")
+
+# Elements whose contents are never visible text, and comments
+_HIDDEN_START = re.compile(r"<(script|style|noscript|template)\b|<!--", re.IGNORECASE)
+_ANY_TAG = re.compile(r"<[^>]*>")
+_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.DOTALL | re.IGNORECASE)
+_HEADING = re.compile(r"<h([12])\b[^>]*>(.*?)</h\1\s*>", re.DOTALL | re.IGNORECASE)
+_BUTTON = re.compile(r"<button\b([^>]*)>(.*?)</button\s*>", re.DOTALL | re.IGNORECASE)
+_INPUT = re.compile(r"<(input|select)\b([^>]*)>", re.IGNORECASE)
+# Divs with an error or alert class, like the error_banner locator. Text up to the first closing div.
+_ERROR_DIV = re.compile(r"""<div\b[^>]*?\bclass\s*=\s*["'][^"']*(?:error|alert)[^"']*["'][^>]*>(.*?)</div\s*>""",
+                        re.DOTALL | re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+
+
+@dataclass
+class Classification:
+    """Verdict for one page and the signal that decided it."""
+    status: str
+    reason: str
+
+
+def _closing_tag(html, tag, start):
+    """Index of the first closing `tag` (any letter case) at or after `start`, -1 if there is none."""
+    while True:
+        end = html.find("</", start)
+        if end < 0 or html[end + 2:end + 2 + len(tag)].lower() == tag:
+            return end
+        start = end + 2
+
+
+def _strip_hidden(html):
+    """
+    Drop script, style, noscript and template contents and comments. The closing tag is
+    found with str.find - a lazy regex over large inline scripts is several times slower.
+    """
+    parts = []
+    pos = 0
+    while True:
+        match = _HIDDEN_START.search(html, pos)
+        if not match:
+            break
+        parts.append(html[pos:match.start()])
+        if match.group(1):
+            end = _closing_tag(html, match.group(1).lower(), match.end())
+            if end >= 0:
+                end = html.find(">", end)
+        else:
+            end = html.find("-->", match.end())
+            end = end + 2 if end >= 0 else -1
+        if end < 0:
+            return "".join(parts)
+        parts.append(" ")
+        pos = end + 1
+    parts.append(html[pos:])
+    return "".join(parts)
+
+
+def _attributes(source):
+    return {name.lower(): next((value for value in values if value), "")
+            for name, *values in _ATTRIBUTE.findall(source)}
+
+
+def _text(fragment):
+    """Visible text of an HTML fragment with entities decoded and whitespace collapsed."""
+    return " ".join(unescape(_ANY_TAG.sub(" ", fragment)).split())
+
+
+def _find_marker(text, markers):
+    """The text line holding the first of the markers found (case-insensitive), or None."""
+    lowered = text.lower()
+    for marker in markers:
+        index = lowered.find(marker)
+        if index >= 0:
+            start = text.rfind("\n", 0, index) + 1
+            end = text.find("\n", index)
+            return " ".join(text[start:end if end >= 0 else len(text)].split())[:200]
+    return None
+
+
+def decide(pre_sale=None, sold_out=None, buy_button=None, ticket_row=False, quantity_input=False,
+           login_form=False, error_page=None, errors=()):
+    """Turn availability signals into a Classification. Shared by the HTML and the browser checks."""
+    if pre_sale:
+        return Classification(PRE_SALE, f"pre-sale notice: {pre_sale}")
+    # A usable buy button wins over a sold-out notice, which may only be about another ticket type
+    if buy_button:
+        return Classification(ON_SALE, f"buy button: {buy_button}")
+    if ticket_row and quantity_input:
+        return Classification(ON_SALE, "ticket row with quantity input")
+    if sold_out:
+        return Classification(SOLD_OUT, f"sold-out notice: {sold_out}")
+    if login_form:
+        return Classification(ERROR, "login form - the session has expired")
+    if error_page:
+        return Classification(ERROR, f"error page: {error_page}")
+    if errors:
+        return Classification(ERROR, f"error message: {errors[0]}")
+    return Classification(UNKNOWN, "no known availability signal")
+
+
+def classify_html(html, ticket_type=None):
+    """
+    Classify raw event-page HTML as PRE_SALE, ON_SALE, SOLD_OUT, ERROR or UNKNOWN.
+
+    `html` is a string or an iterable of string chunks (e.g. a streamed response body).
+    Text inside script, style and template elements is ignored. The page is scanned with
+    a handful of precompiled patterns rather than built into a tree, which keeps a check
+    well under a millisecond for a full-size event page.
+    """
+    if not isinstance(html, str):
+        html = "".join(html)
+    visible = _strip_hidden(html)
+
+    # One line per text node, so markers never match across elements
+    text = unescape(_ANY_TAG.sub("\n", visible))
+    pre_sale = _find_marker(text, PRE_SALE_MARKERS)
+    if pre_sale:
+        # Nothing else on the page can overrule the pre-sale notice
+        return decide(pre_sale=pre_sale)
+
+    buy_button = None
+    for attributes, content in _BUTTON.findall(visible):
+        attributes = _attributes(attributes)
+        # Disabled buy buttons are shown on sold-out pages, so only enabled ones count
+        if "disabled" in attributes or attributes.get("aria-disabled") == "true":
+            continue
+        label = _text(content)
+        if any(buy_label in label for buy_label in BUY_BUTTON_LABELS):
+            buy_button = label
+            break
+
+    quantity_input = login_form = False
+    for tag, attributes in _INPUT.findall(visible):
+        attributes = _attributes(attributes)
+        # Sold-out rows can keep a disabled input, so only an editable one means tickets can be chosen
+        usable = "disabled" not in attributes and "readonly" not in attributes
+        if tag.lower() == "select":
+            name = attributes.get("name", "").lower()
+            quantity_input = quantity_input or usable and ("quantity" in name or "amount" in name)
+        elif attributes.get("type", "").lower() == "number":
+            quantity_input = quantity_input or usable
+        elif attributes.get("type", "").lower() == "password" or attributes.get("id") == "username":
+            login_form = True
+
+    ticket_row = bool(ticket_type) and ticket_type in text
+
+    titles = [_text(match) for match in _TITLE.findall(visible)]
+    titles += [_text(content) for _, content in _HEADING.findall(visible)]
+    error_page = _find_marker("\n".join(titles), ERROR_PAGE_MARKERS)
+
+    errors = [message[:200] for message in map(_text, _ERROR_DIV.findall(visible)) if message]
+    return decide(None, _find_marker(text, SOLD_OUT_MARKERS), buy_button, ticket_row,
+                  quantity_input, login_form, error_page, errors)
+
+
+def classify_page_state(state):
+    """Classify a browser PageState snapshot with the same rules as classify_html."""
+    buy_button = "buy button" if state.buy_button_enabled else None
+    return decide(pre_sale=state.sale_status, buy_button=buy_button, ticket_row=state.ticket_row,
+                  quantity_input=state.quantity_max is not None, errors=state.errors)
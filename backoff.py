@@ -0,0 +1,198 @@
+"""
+Server-load-aware polling - backs off with jitter when the site answers 429/5xx, times out
+or gets slower, and opens a circuit breaker after repeated failures so an overloaded
+endpoint is not hammered while it cannot answer anyway.
+"""
+
+import logging
+import math
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+# Error pages served with any status (e.g. a queue page answered with 200) that mean the server is struggling
+OVERLOAD_PAGE_MARKERS = ("service unavailable", "internal server error", "bad gateway", "too many requests")
+
+
+def is_overloaded(status, error=None):
+    """
+    Whether a poll means the server is struggling: a 429/5xx, an overload error page, or a
+    request that failed without any response (status None), e.g. a timeout.
+    """
+    if status in OVERLOAD_STATUSES:
+        return True
+    if error and any(marker in error.lower() for marker in OVERLOAD_PAGE_MARKERS):
+        return True
+    return status is None and error is not None
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header given in seconds; HTTP dates are ignored."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class PollBackoff:
+    """
+    Stretches the polling interval while the server is struggling.
+
+    Every overload signal (429/5xx, timeout, a response much slower than the running
+    baseline for its source) doubles the backoff up to `max_delay`; the level stops where
+    the delay reaches `max_delay`, so a long outage doesn't pile up levels to unwind. A
+    healthy response steps a long backoff down by one and drops a short one at once, so
+    polling is back at full speed within a few checks after recovery. Delays are jittered
+    so many clients don't retry in lockstep.
+    """
+
+    def __init__(self, base_delay=0.2, max_delay=10.0, latency_factor=3.0, min_latency_rise=0.3,
+                 smoothing=0.2, rng=None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_factor = latency_factor
+        self.min_latency_rise = min_latency_rise
+        self.smoothing = smoothing
+        self.rng = rng or random.Random()
+        self.max_level = max(1, math.ceil(math.log2(max_delay / base_delay))) if base_delay > 0 else 1
+        self.level = 0
+        self.retry_after = None
+        self.baselines = {}
+        self.last_reason = None
+        self.last_failed = False
+
+    def _slow(self, source, elapsed):
+        baseline = self.baselines.get(source)
+        if baseline is None:
+            self.baselines[source] = elapsed
+            return False
+        slow = elapsed > baseline * self.latency_factor and elapsed - baseline > self.min_latency_rise
+        if not slow:
+            # Only healthy responses move the baseline, so a slow spell can't become the new normal
+            self.baselines[source] = baseline + self.smoothing * (elapsed - baseline)
+        return slow
+
+    def record(self, source, status, elapsed, error=None, retry_after=None):
+        """Record one poll. Returns the overload reason, or None if the response was healthy."""
+        reason = None
+        self.last_failed = is_overloaded(status, error)
+        if self.last_failed:
+            reason = f"HTTP {status}" if status else f"request failed ({error})"
+        elif self._slow(source, elapsed):
+            reason = f"slow response ({elapsed * 1000:.0f} ms, usually {self.baselines[source] * 1000:.0f} ms)"
+
+        if reason:
+            self.level = min(self.max_level, self.level + 1)
+            self.retry_after = retry_after
+        else:
+            self.level = max(0, self.level - 1) if self.level > 2 else 0
+            self.retry_after = None
+        self.last_reason = reason
+        return reason
+
+    def reset(self):
+        """Back to full speed, e.g. once a circuit breaker closed again."""
+        self.level = 0
+        self.retry_after = None
+
+    def delay(self, interval):
+        """The interval to sleep before the next poll: `interval` when healthy, backed off otherwise."""
+        if self.level == 0:
+            return interval
+        backoff = min(self.max_delay, max(interval, self.base_delay) * 2 ** self.level)
+        # Equal jitter: at least half the backoff, so the delay still grows with the level
+        delay = backoff / 2 + self.rng.uniform(0, backoff / 2)
+        if self.retry_after is not None:
+            delay = max(delay, min(self.retry_after, self.max_delay))
+        return max(interval, delay)
+
+
+class CircuitBreaker:
+    """
+    Stops polling an endpoint after `failure_threshold` overloaded responses in a row.
+
+    While open no requests should be sent. After `open_time` one trial request is let
+    through (half-open): if it succeeds the breaker closes and polling resumes at once,
+    if it fails the breaker opens again for twice as long, up to `max_open_time`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, open_time=1.0, max_open_time=15.0):
+        self.failure_threshold = failure_threshold
+        self.initial_open_time = open_time
+        self.open_time = open_time
+        self.max_open_time = max_open_time
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+
+    def remaining(self, now=None):
+        """Seconds until the next request may be sent; 0 when closed or ready for a trial."""
+        if self.state != self.OPEN:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        left = self.opened_at + self.open_time - now
+        if left <= 0:
+            self.state = self.HALF_OPEN
+            return 0.0
+        return left
+
+    def record(self, ok, now=None):
+        now = time.monotonic() if now is None else now
+        self.remaining(now)  # An open breaker whose pause is over turns half-open for this trial
+        if ok:
+            if self.state != self.CLOSED:
+                logger.info("Circuit closed - the server answers again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.open_time = self.initial_open_time
+            return
+
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            # The trial failed - wait longer before the next one
+            self.open_time = min(self.max_open_time, self.open_time * 2)
+            self._open(now)
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self.opened_at = now
+        self.opens += 1
+        logger.warning(f"Circuit open after {self.failures} failed checks - pausing for {self.open_time:.1f} s")
+
+
+class AdaptivePolling:
+    """Backoff and circuit breaker fed from the same polls; the one object the polling loops talk to."""
+
+    def __init__(self, backoff=None, breaker=None):
+        self.backoff = backoff or PollBackoff()
+        self.breaker = breaker or CircuitBreaker()
+
+    @property
+    def overloaded(self):
+        """Whether the last poll failed because of the server (slow responses don't count)."""
+        return self.backoff.last_failed
+
+    def record(self, source, status, elapsed, error=None, retry_after=None):
+        """Record one poll and return the overload reason, or None if the response was healthy."""
+        reason = self.backoff.record(source, status, elapsed, error, retry_after)
+        was_closed = self.breaker.state == CircuitBreaker.CLOSED
+        # Slow answers only stretch the interval; the breaker counts failed requests
+        self.breaker.record(not self.backoff.last_failed)
+        if not was_closed and self.breaker.state == CircuitBreaker.CLOSED:
+            # The trial after an outage went through - resume at full speed instead of stepping down
+            self.backoff.reset()
+        return reason
+
+    def delay(self, interval):
+        """Seconds to wait before the next poll: at least `interval`, longer while backing off or the circuit is open."""
+        return max(self.backoff.delay(interval), self.breaker.remaining())
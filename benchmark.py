@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner - drives EventfrogTicketBuyer.run() against the local stand-in server
+and reports how long it takes from the sale flip to reaching the final purchase step.
+Also measures the offline availability classifier against the recorded page corpus and
+fixed-interval against adaptive polling while the stand-in plays an overloaded site.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import browser_profile
+import main
+import purchase_flow
+from availability import classify_html
+from backoff import AdaptivePolling, CircuitBreaker, PollBackoff
+from inventory import NetworkInventoryWatcher, RecordedNetworkLog
+from probe import AvailabilityProbe, create_pool
+from standin_server import DEFAULT_TICKET_TYPE, TRACKER_PATH, StandInServer
+from step_timings import percentile
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+NETWORK_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "network")
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "min": min(samples) if samples else None,
+        "max": max(samples) if samples else None,
+        "mean": statistics.fmean(samples) if samples else None,
+    }
+
+
+def point_buyer_at(server):
+    """Redirect the module-level constants in main.py to the stand-in server."""
+    main.BASE_URL = server.base_url
+    main.LOGIN_URL = server.login_url
+    main.EVENT_URL = server.event_url
+    main.TICKET_TYPE = server.ticket_type
+    main.SALE_DATE = server.sale_date
+    # The stand-in's sale date lies in the past - keep polling at REFRESH_INTERVAL like around a real sale
+    main.SALE_WINDOW_AFTER = float("inf")
+    # Never mix stand-in cookies into the real session cache
+    main.SESSION_CACHE_FILE = None
+    main.CHECKPOINT_FILE = None
+    # Stand-in latencies would tune the timeouts of the real purchase steps
+    main.STEP_TIMINGS_FILE = None
+    main.LOGIN_EMAIL = main.LOGIN_EMAIL or "benchmark@example.com"
+    main.LOGIN_PASSWORD = main.LOGIN_PASSWORD or "benchmark"
+
+
+class BenchmarkBuyer(main.EventfrogTicketBuyer):
+    """Ticket buyer that schedules the sale flip after login and timestamps the final step."""
+
+    def __init__(self, server, lead):
+        self.server = server
+        self.lead = lead
+        self.flip_at = None
+        self.reached_at = None
+        super().__init__()
+
+    def login(self):
+        logged_in = super().login()
+        if main.WARM_PATH:
+            # The stand-in's sale date lies in the past, so the fast-polling window never leaves room for it
+            self._warm_up()
+        # Flip only once we're polling so login time never leaks into the measurement
+        self.flip_at = self.server.open_sale_in(self.lead)
+        return logged_in
+
+    def _complete_purchase(self, step, complete_button):
+        if self.reached_at is None:
+            self.reached_at = time.time()
+        return super()._complete_purchase(step, complete_button)
+
+
+def run_purchase_benchmark(runs, lead, asset_max_age=None):
+    latencies = []
+    with StandInServer(asset_max_age=asset_max_age) as server:
+        point_buyer_at(server)
+        for run in range(1, runs + 1):
+            server.close_sale()
+            buyer = BenchmarkBuyer(server, lead)
+            buyer.run()
+            if buyer.reached_at is None or buyer.flip_at is None:
+                logger.warning(f"Run {run}/{runs} never reached the purchase step")
+                continue
+            latency = buyer.reached_at - buyer.flip_at
+            latencies.append(latency)
+            logger.info(f"Run {run}/{runs}: flip -> complete purchase in {latency * 1000:.0f} ms")
+    return summarize(latencies)
+
+
+def run_warm_path_benchmark(runs, lead, asset_max_age=3600):
+    """Flip to _complete_purchase with and without the pre-sale warm path, assets served cacheable like on the real site."""
+    results = {}
+    for name, warm_path in (("cold", False), ("warm", True)):
+        main.WARM_PATH = warm_path
+        results[name] = run_purchase_benchmark(runs, lead, asset_max_age)
+    return results
+
+
+class SimulatedCrash(BaseException):
+    """Raised from a state transition; not an Exception so no handler in main.py swallows it."""
+
+
+class CrashingBuyer(main.EventfrogTicketBuyer):
+    """Ticket buyer that dies on reaching `crash_at` and timestamps the checkout page."""
+
+    def __init__(self, crash_at=None, resume=False):
+        self.crash_at = crash_at
+        self.checkout_at = None
+        super().__init__(resume=resume)
+
+    def _on_purchase_transition(self, old_state, new_state):
+        super()._on_purchase_transition(old_state, new_state)
+        if new_state == purchase_flow.CHECKOUT and self.checkout_at is None:
+            self.checkout_at = self.startup.since_start()
+        if new_state == self.crash_at:
+            raise SimulatedCrash(new_state)
+
+
+def run_resume_benchmark(runs, crash_at=purchase_flow.IN_CART):
+    """
+    Kill a run right after it reaches `crash_at`, then restart with --resume and measure the
+    time from the restart to the checkout page. A fresh run's start to checkout is measured
+    for comparison.
+    """
+    samples = {"fresh_to_checkout": [], "resume_to_checkout": []}
+    with StandInServer() as server, tempfile.TemporaryDirectory() as directory:
+        point_buyer_at(server)
+        main.CHECKPOINT_FILE = os.path.join(directory, "checkpoint")
+        server.open_sale_in(0)
+        for run in range(1, runs + 1):
+            crashed = CrashingBuyer(crash_at=crash_at)
+            try:
+                crashed.run()
+            except SimulatedCrash:
+                pass
+            resumed = CrashingBuyer(resume=True)
+            resumed.run()
+            if crashed.checkout_at is None:
+                fresh = CrashingBuyer()
+                fresh.run()
+                crashed.checkout_at = fresh.checkout_at
+            if resumed.checkout_at is None or crashed.checkout_at is None:
+                logger.warning(f"Run {run}/{runs} never reached the checkout page")
+                continue
+            samples["fresh_to_checkout"].append(crashed.checkout_at)
+            samples["resume_to_checkout"].append(resumed.checkout_at)
+            logger.info(f"Run {run}/{runs}: resumed to checkout in {resumed.checkout_at * 1000:.0f} ms")
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def run_startup_benchmark(runs):
+    """Cold start to the first completed availability check, with the per-stage breakdown."""
+    stages = {}
+    with StandInServer() as server:
+        point_buyer_at(server)
+        for run in range(1, runs + 1):
+            buyer = main.EventfrogTicketBuyer()
+            try:
+                stages.setdefault("init", []).append(buyer.startup.since_start())
+                buyer.login()
+                stages.setdefault("login_done", []).append(buyer.startup.since_start())
+                buyer.check_ticket_availability()
+                stages.setdefault("first_check_done", []).append(buyer.startup.since_start())
+                for stage in buyer.startup.stages:
+                    stages.setdefault(stage["stage"], []).append(stage["duration"])
+            finally:
+                buyer.cleanup()
+            logger.info(f"Run {run}/{runs}: first check done after {stages['first_check_done'][-1] * 1000:.0f} ms")
+    return {name: summarize(samples) for name, samples in stages.items()}
+
+
+PROFILE_PAGES = ["/en/login.html", "/en/account.html", "EVENT", "/cart", "/checkout", "/confirm"]
+
+
+def measure_profile(server, profile, rounds):
+    """Load every page of the purchase flow `rounds` times and record time and bytes per load."""
+    main.BROWSER_PROFILE = profile
+    main.EXTRA_BLOCKED_URL_PATTERNS = [f"*{server.third_party_url}{TRACKER_PATH}*"]
+    buyer = main.EventfrogTicketBuyer()
+    driver = buyer.driver
+    try:
+        # Log in and put a ticket in the cart so the checkout pages render
+        driver.get(server.login_url)
+        driver.execute_script(
+            "document.getElementById('username').value = arguments[0];"
+            "document.getElementById('password').value = arguments[1];"
+            "document.getElementById('submit').click();",
+            main.LOGIN_EMAIL, main.LOGIN_PASSWORD,
+        )
+        WebDriverWait(driver, 10).until(EC.url_contains("account"))
+        server.open_sale_in(0)
+        driver.get(server.event_url)
+        driver.execute_script("document.getElementById('tickets').submit();")
+        WebDriverWait(driver, 10).until(EC.url_contains("/cart"))
+
+        results = {}
+        for _ in range(rounds):
+            for page in PROFILE_PAGES:
+                url = server.event_url if page == "EVENT" else server.base_url + page
+                start = time.perf_counter()
+                driver.get(url)
+                elapsed = time.perf_counter() - start
+                # Let in-flight requests settle so the byte count covers everything the page pulled in
+                driver.execute_async_script(
+                    "var done = arguments[arguments.length - 1];"
+                    "if (document.readyState === 'complete') { done(); }"
+                    "else { window.addEventListener('load', function () { done(); }); }"
+                )
+                metrics = browser_profile.measure_page_load(driver)
+                page_results = results.setdefault(page, {"ms": [], "bytes": []})
+                page_results["ms"].append(elapsed * 1000)
+                page_results["bytes"].append(metrics["bytes"])
+        return {
+            page: {"ms": statistics.median(values["ms"]), "bytes": statistics.median(values["bytes"])}
+            for page, values in results.items()
+        }
+    finally:
+        server.close_sale()
+        buyer.cleanup()
+
+
+def run_profile_benchmark(rounds):
+    with StandInServer() as server:
+        point_buyer_at(server)
+        return {profile: measure_profile(server, profile, rounds) for profile in browser_profile.PROFILES}
+
+
+def print_profile_comparison(results):
+    normal, fast = results["normal"], results["fast"]
+    print(f"{'page':<18} {'normal ms':>10} {'fast ms':>10} {'saved ms':>10} {'normal KB':>10} {'fast KB':>10} {'saved KB':>10}")
+    for page in PROFILE_PAGES:
+        n, f = normal[page], fast[page]
+        print(f"{page:<18} {n['ms']:10.1f} {f['ms']:10.1f} {n['ms'] - f['ms']:10.1f} "
+              f"{n['bytes'] / 1024:10.1f} {f['bytes'] / 1024:10.1f} {(n['bytes'] - f['bytes']) / 1024:10.1f}")
+
+
+def load_fixtures(directory=FIXTURE_DIR):
+    """Recorded event pages as (name, expected status, html). Files are named <status>__<description>.html."""
+    fixtures = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".html"):
+            continue
+        expected, _, _ = filename.partition("__")
+        with open(os.path.join(directory, filename), encoding="utf-8") as f:
+            fixtures.append((filename[:-5], expected, f.read()))
+    return fixtures
+
+
+def run_classifier_benchmark(rounds, ticket_type=DEFAULT_TICKET_TYPE):
+    """Check every fixture classifies as its file name says, then time classify_html per page."""
+    pages = {}
+    mismatches = []
+    total_time = 0.0
+    total_runs = 0
+    for name, expected, html in load_fixtures():
+        status = classify_html(html, ticket_type).status
+        if status != expected:
+            mismatches.append({"page": name, "expected": expected, "status": status})
+
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            classify_html(html, ticket_type)
+            samples.append(time.perf_counter() - start)
+        total_time += sum(samples)
+        total_runs += len(samples)
+        pages[name] = {"status": status, "kb": len(html.encode("utf-8")) / 1024, **summarize(samples)}
+
+    return {
+        "pages": pages,
+        "classifications_per_second": total_runs / total_time if total_time else None,
+        "mismatches": mismatches,
+    }
+
+
+def run_inventory_replay(rounds, ticket_type=DEFAULT_TICKET_TYPE):
+    """
+    Replay every recorded performance log through NetworkInventoryWatcher and check it decides
+    as the file name says (<status>__<description>.json, "undecided" when no response decides).
+    """
+    pages = {}
+    mismatches = []
+    for filename in sorted(os.listdir(NETWORK_FIXTURE_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        name = filename[:-5]
+        expected = name.partition("__")[0]
+        path = os.path.join(NETWORK_FIXTURE_DIR, filename)
+
+        samples = []
+        status = None
+        for _ in range(rounds):
+            replay = RecordedNetworkLog(path)
+            start = time.perf_counter()
+            decision = NetworkInventoryWatcher(replay, ticket_type).poll()
+            samples.append(time.perf_counter() - start)
+            status = decision.status if decision else "undecided"
+        if status != expected:
+            mismatches.append({"page": name, "expected": expected, "status": status})
+        pages[name] = {"status": status, "kb": os.path.getsize(path) / 1024, **summarize(samples)}
+    return {"pages": pages, "mismatches": mismatches}
+
+
+def poll_until_open(server, adaptive, stop_at, log):
+    """One polling client: probe the stand-in until the sale is open or `stop_at` passed."""
+    probe = AvailabilityProbe(server.event_url, server.ticket_type, pool=create_pool(timeout=2.0, maxsize=1))
+    polling = AdaptivePolling(
+        PollBackoff(base_delay=main.REFRESH_INTERVAL, max_delay=main.MAX_BACKOFF),
+        CircuitBreaker(main.BREAKER_FAILURES, main.BREAKER_OPEN_TIME, main.BREAKER_MAX_OPEN_TIME),
+    )
+    while time.monotonic() < stop_at:
+        result = probe.check()
+        ok = result.available is not None
+        log.append({"at": time.monotonic(), "ok": ok, "elapsed": result.elapsed, "available": result.available})
+        if result.available:
+            return
+        delay = main.REFRESH_INTERVAL
+        if adaptive:
+            polling.record("http", result.status, result.elapsed, result.error, result.retry_after)
+            delay = polling.delay(delay)
+        time.sleep(delay)
+
+
+def run_backoff_benchmark(clients, healthy, overload, recovery, open_after):
+    """
+    Run `clients` pollers against a stand-in that is healthy, then overloaded (latency growing
+    with the request rate, 429 above capacity, random 503s), then healthy again - once with a
+    fixed REFRESH_INTERVAL and once with the adaptive backoff and circuit breaker. The sale
+    opens `open_after` seconds into the overload.
+    """
+    results = {}
+    for strategy in ("fixed", "adaptive"):
+        with StandInServer(assets=False, seed=1) as server:
+            start = time.monotonic()
+            overload_start = start + healthy
+            overload_end = overload_start + overload
+            sale_at = overload_start + open_after
+            server.open_sale_at(time.time() + healthy + open_after)
+            logs = [[] for _ in range(clients)]
+            threads = [threading.Thread(target=poll_until_open,
+                                        args=(server, strategy == "adaptive", overload_end + recovery, log))
+                       for log in logs]
+            for thread in threads:
+                thread.start()
+            time.sleep(healthy)
+            server.set_faults(error_rate=0.3, latency=0.1, capacity=15, retry_after=1)
+            time.sleep(overload)
+            server.clear_faults()
+            for thread in threads:
+                thread.join()
+
+        polls = [poll for log in logs for poll in log]
+        during = [poll for poll in polls if overload_start <= poll["at"] < overload_end]
+        detections = [next((poll["at"] - sale_at for poll in log if poll["available"]), None) for log in logs]
+        found = [delay for delay in detections if delay is not None]
+        results[strategy] = {
+            "requests": len(polls),
+            "requests_during_overload": len(during),
+            "failed_during_overload": sum(not poll["ok"] for poll in during),
+            "ok_latency": summarize([poll["elapsed"] for poll in during if poll["ok"]]),
+            "detection": summarize(found),
+            "missed": len(detections) - len(found),
+        }
+        logger.info(f"{strategy}: {len(polls)} requests, {len(found)}/{clients} clients saw the sale open")
+    return results
+
+
+def run_recovery_check(outage_polls, max_recovery_polls=3):
+    """
+    Offline check: after `outage_polls` failed polls, how many healthy polls it takes until
+    the delay is back at REFRESH_INTERVAL - with the circuit breaker, and for slow answers
+    alone (backoff without breaker). Both must recover within a few polls.
+    """
+    def new_polling():
+        return AdaptivePolling(
+            PollBackoff(base_delay=main.REFRESH_INTERVAL, max_delay=main.MAX_BACKOFF, rng=random.Random(1)),
+            CircuitBreaker(main.BREAKER_FAILURES, main.BREAKER_OPEN_TIME, main.BREAKER_MAX_OPEN_TIME),
+        )
+
+    def polls_to_recover(polling):
+        for polls in range(1, 1000):
+            polling.record("http", 200, 0.05)
+            if polling.delay(main.REFRESH_INTERVAL) == main.REFRESH_INTERVAL:
+                return polls
+        return None
+
+    results = {}
+    outage = new_polling()
+    for _ in range(outage_polls):
+        outage.record("http", 503, 0.05)
+    results["outage"] = {"level": outage.backoff.level, "polls_to_recover": polls_to_recover(outage)}
+
+    slow = new_polling()
+    slow.record("http", 200, 0.05)
+    for _ in range(outage_polls):
+        slow.record("http", 200, 5.0)
+    results["slow"] = {"level": slow.backoff.level, "polls_to_recover": polls_to_recover(slow)}
+
+    # Slow answers never open the breaker, so they step down from the capped level
+    limits = {"outage": max_recovery_polls, "slow": slow.backoff.max_level}
+    failures = [name for name, result in results.items()
+                if result["polls_to_recover"] is None or result["polls_to_recover"] > limits[name]]
+    return {"results": results, "limits": limits, "failures": failures}
+
+
+def print_backoff_comparison(results):
+    print(f"{'strategy':<10} {'requests':>9} {'overload':>9} {'failed':>7} {'ok p50 ms':>10} {'ok p95 ms':>10} "
+          f"{'detect p50 ms':>14} {'detect max ms':>14} {'missed':>7}")
+    for strategy, result in results.items():
+        latency, detection = result["ok_latency"], result["detection"]
+
+        def ms(value):
+            return f"{value * 1000:.0f}" if value is not None else "-"
+
+        print(f"{strategy:<10} {result['requests']:>9} {result['requests_during_overload']:>9} "
+              f"{result['failed_during_overload']:>7} {ms(latency['p50']):>10} {ms(latency['p95']):>10} "
+              f"{ms(detection['p50']):>14} {ms(detection['max']):>14} {result['missed']:>7}")
+
+
+def print_classifier_results(results):
+    print(f"{'page':<36} {'status':<9} {'KB':>7} {'p50 us':>9} {'p95 us':>9}")
+    for name, page in results["pages"].items():
+        print(f"{name:<36} {page['status']:<9} {page['kb']:7.1f} {page['p50'] * 1e6:9.1f} {page['p95'] * 1e6:9.1f}")
+    if results.get("classifications_per_second"):
+        print(f"Classifications per second: {results['classifications_per_second']:.0f}")
+    for mismatch in results["mismatches"]:
+        print(f"MISMATCH {mismatch['page']}: expected {mismatch['expected']}, got {mismatch['status']}")
+
+
+def print_summary(title, summary):
+    print(title)
+    for key, value in summary.items():
+        if isinstance(value, float):
+            print(f"  {key:>5}: {value * 1000:9.1f} ms")
+        else:
+            print(f"  {key:>5}: {value}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Eventfrog ticket buyer benchmarks against the local stand-in server")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    purchase = subcommands.add_parser("purchase", help="Sale flip to _complete_purchase latency")
+    purchase.add_argument("--runs", type=int, default=20)
+    purchase.add_argument("--lead", type=float, default=2.0, help="Seconds between login and the sale flip")
+    purchase.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    warm = subcommands.add_parser("warm", help="Sale flip to _complete_purchase, with and without the warm path")
+    warm.add_argument("--runs", type=int, default=10)
+    warm.add_argument("--lead", type=float, default=2.0, help="Seconds between login and the sale flip")
+    warm.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    profiles = subcommands.add_parser("profiles", help="Per-page load time and bytes, normal vs fast browser profile")
+    profiles.add_argument("--rounds", type=int, default=5)
+    profiles.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    startup = subcommands.add_parser("startup", help="Cold start to first check, per-stage breakdown")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    classifier = subcommands.add_parser("classifier", help="Offline availability classifier accuracy and speed")
+    classifier.add_argument("--rounds", type=int, default=200)
+    classifier.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    inventory = subcommands.add_parser("inventory", help="Replay recorded network logs through the inventory watcher")
+    inventory.add_argument("--rounds", type=int, default=50)
+    inventory.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    resume = subcommands.add_parser("resume", help="Crash with tickets in the cart, then restart to checkout")
+    resume.add_argument("--runs", type=int, default=5)
+    resume.add_argument("--crash-at", default=purchase_flow.IN_CART, choices=purchase_flow.RESUMABLE_STATES,
+                        help="Purchase state right after which the first run dies")
+    resume.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    backoff = subcommands.add_parser("backoff", help="Fixed vs adaptive polling against an overloaded stand-in")
+    backoff.add_argument("--clients", type=int, default=8, help="Polling clients running at the same time")
+    backoff.add_argument("--healthy", type=float, default=2.0, help="Seconds before the overload starts")
+    backoff.add_argument("--overload", type=float, default=8.0, help="Seconds the stand-in stays overloaded")
+    backoff.add_argument("--recovery", type=float, default=4.0, help="Seconds of polling after the overload")
+    backoff.add_argument("--open-after", type=float, default=6.0, help="Sale flip, in seconds into the overload")
+    backoff.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    recovery = subcommands.add_parser("recovery", help="Offline check: polls back to full speed after a long outage")
+    recovery.add_argument("--outage-polls", type=int, default=80)
+    recovery.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "purchase":
+        summary = run_purchase_benchmark(args.runs, args.lead)
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print_summary("Sale flip -> _complete_purchase", summary)
+    elif args.command == "warm":
+        results = run_warm_path_benchmark(args.runs, args.lead)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for name, summary in results.items():
+                print_summary(f"Sale flip -> _complete_purchase ({name})", summary)
+    elif args.command == "profiles":
+        results = run_profile_benchmark(args.rounds)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_profile_comparison(results)
+    elif args.command == "startup":
+        results = run_startup_benchmark(args.runs)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for name, summary in results.items():
+                print_summary(name, summary)
+    elif args.command == "resume":
+        results = run_resume_benchmark(args.runs, args.crash_at)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for name, summary in results.items():
+                print_summary(name, summary)
+    elif args.command == "backoff":
+        results = run_backoff_benchmark(args.clients, args.healthy, args.overload, args.recovery, args.open_after)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_backoff_comparison(results)
+    elif args.command == "recovery":
+        results = run_recovery_check(args.outage_polls)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for name, result in results["results"].items():
+                print(f"{name:<8} level {result['level']:>2} after {args.outage_polls} polls, back to "
+                      f"{main.REFRESH_INTERVAL} s after {result['polls_to_recover']} healthy polls "
+                      f"(limit {results['limits'][name]})")
+        if results["failures"]:
+            sys.exit(1)
+    elif args.command in ("classifier", "inventory"):
+        if args.command == "classifier":
+            results = run_classifier_benchmark(args.rounds)
+        else:
+            results = run_inventory_replay(args.rounds)
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            print_classifier_results(results)
+        if results["mismatches"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
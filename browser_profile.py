@@ -0,0 +1,82 @@
+"""
+Browser profiles - the default "normal" Chrome and a "fast" profile that runs headless,
+returns from page loads at DOMContentLoaded and blocks images, fonts and third-party trackers.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ("normal", "fast")
+
+# Resource types that never matter for buying a ticket
+HEAVY_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm",
+]
+
+# Analytics, ads and social widgets loaded by the event pages
+THIRD_PARTY_PATTERNS = [
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*analytics.google.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*adservice.google.*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*connect.facebook.*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*criteo.*",
+    "*tiktok.com*",
+    "*youtube.com/embed*",
+    "*maps.googleapis.com*",
+]
+
+# Reads page load cost from the Navigation and Resource Timing APIs
+PAGE_LOAD_METRICS_JS = """
+    var nav = performance.getEntriesByType('navigation')[0];
+    var resources = performance.getEntriesByType('resource');
+    var bytes = nav ? nav.transferSize : 0;
+    for (var i = 0; i < resources.length; i++) {
+        bytes += resources[i].transferSize || 0;
+    }
+    return {
+        bytes: bytes,
+        resources: resources.length,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : null,
+        load_ms: nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null
+    };
+"""
+
+
+def configure_options(chrome_options, profile, headless=True):
+    """Apply the Chrome options of a profile before the driver is created."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile '{profile}', expected one of {', '.join(PROFILES)}")
+
+    if profile == "fast":
+        # Hand control back as soon as the DOM is ready instead of waiting for every asset
+        chrome_options.page_load_strategy = "eager"
+        if headless:
+            chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-background-networking")
+    return chrome_options
+
+
+def apply_request_blocking(driver, extra_patterns=()):
+    """Block heavy resources and third-party domains through DevTools request interception."""
+    patterns = HEAVY_RESOURCE_PATTERNS + THIRD_PARTY_PATTERNS + list(extra_patterns)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.info(f"Blocking {len(patterns)} URL patterns via DevTools")
+    return patterns
+
+
+def measure_page_load(driver):
+    """Bytes transferred and timing of the current page, as reported by the browser."""
+    return driver.execute_script(PAGE_LOAD_METRICS_JS)
@@ -0,0 +1,103 @@
+"""
+Run checkpoints - a small encrypted snapshot of the buyer's progress (logged-in session,
+purchase state, ticket quantity, counters and the page it was on), written after every
+purchase state transition so a restarted process can pick up at the cart or checkout
+instead of starting over at the login page.
+
+The buyer captures the session once after login and reuses it for the snapshots of
+later transitions. Snapshots are encrypted and written on a background thread, so the
+purchase flow doesn't wait for the disk or scrypt.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_file import atomic_write
+from session_cache import decrypt, encrypt
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+class CheckpointStore:
+    """Writes the latest checkpoint of a run to an encrypted file and reads it back on resume."""
+
+    def __init__(self, path, secret, max_age=1800):
+        self.path = path
+        self.secret = secret
+        self.max_age = max_age
+        self._pending = None
+        self._writing = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+
+    def save(self, snapshot):
+        """Queue a snapshot for writing. If writes fall behind only the newest one is written."""
+        snapshot = dict(snapshot, version=VERSION, saved_at=time.time())
+        with self._lock:
+            self._pending = snapshot
+            if self._writing is None:
+                self._writing = self._pool.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                snapshot, self._pending = self._pending, None
+                if snapshot is None:
+                    self._writing = None
+                    return
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                logger.warning(f"Error writing checkpoint: {str(e)}")
+
+    def _write(self, snapshot):
+        blob = encrypt(self.secret, json.dumps(snapshot).encode("utf-8"))
+        atomic_write(self.path, blob, permissions=0o600)
+
+    def flush(self):
+        """Wait until the queued snapshot is on disk."""
+        with self._lock:
+            writing = self._writing
+        if writing is not None:
+            writing.result()
+
+    def load(self, event_url):
+        """The checkpoint of a run for `event_url`, or None if there is none worth resuming."""
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        plaintext = decrypt(self.secret, blob)
+        if plaintext is None:
+            logger.warning(f"Checkpoint {self.path} could not be decrypted - ignoring it")
+            return None
+        checkpoint = json.loads(plaintext)
+        if checkpoint.get("version") != VERSION:
+            logger.info(f"Checkpoint {self.path} was written by another version - ignoring it")
+            return None
+        if checkpoint.get("event_url") != event_url:
+            logger.info(f"Checkpoint {self.path} belongs to another event - ignoring it")
+            return None
+        age = time.time() - checkpoint["saved_at"]
+        if age > self.max_age:
+            logger.info(f"Checkpoint {self.path} is {age / 60:.0f} minutes old - ignoring it")
+            return None
+        return checkpoint
+
+    def clear(self):
+        self.flush()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
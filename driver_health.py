@@ -0,0 +1,284 @@
+"""
+Driver health supervision - tracks renderer memory, page-load latency drift and WebDriver
+errors of the active Chrome, keeps a pre-logged-in standby Chrome warm and swaps to it
+between two checks when the active one degrades or dies.
+"""
+
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+MAX_RENDERER_RSS_MB = 1500  # Swap once the renderers of the active Chrome use more memory than this
+RSS_GROWTH_FACTOR = 3.0  # ... or grew this many times over the first measurement
+LATENCY_DRIFT_FACTOR = 2.0  # Swap when recent page loads take this many times the baseline ...
+MIN_LATENCY_DRIFT = 0.2  # ... and at least this many seconds longer
+BASELINE_SAMPLES = 20  # Page loads that make up the baseline latency
+RECENT_SAMPLES = 20  # Page loads compared against the baseline
+MAX_ERRORS = 5  # WebDriver errors within ERROR_WINDOW that mark the driver as degraded
+ERROR_WINDOW = 60.0
+HEALTH_INTERVAL = 30.0  # Seconds between memory measurements and liveness pings
+STANDBY_RETRY_INTERVAL = 60.0  # Seconds before building a standby again after it failed to start
+
+# WebDriver error messages that mean the browser is gone, not just that a command failed
+FATAL_ERRORS = ("invalid session id", "chrome not reachable", "tab crashed", "target window already closed",
+                "disconnected", "session deleted")
+
+
+def _read_proc(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def renderer_rss(root_pid):
+    """
+    Resident memory in bytes of all Chrome renderer processes below `root_pid` (chromedriver),
+    read from /proc. Returns None where /proc is not available.
+    """
+    if not root_pid or not os.path.isdir("/proc"):
+        return None
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read_proc(f"/proc/{entry}/stat")
+        if not stat:
+            continue
+        # The command name may contain spaces, the parent pid is the second field after it
+        fields = stat[stat.rfind(b")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    total = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        cmdline = _read_proc(f"/proc/{pid}/cmdline") or b""
+        if b"--type=renderer" not in cmdline:
+            continue
+        for line in (_read_proc(f"/proc/{pid}/status") or b"").splitlines():
+            if line.startswith(b"VmRSS:"):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def is_fatal(error):
+    message = str(error).lower()
+    return any(fatal in message for fatal in FATAL_ERRORS)
+
+
+class DriverHealth:
+    """Health statistics of one driver."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.load_times = deque(maxlen=BASELINE_SAMPLES + RECENT_SAMPLES)
+        self.baseline = []
+        self.errors = deque()
+        self.fatal = None
+        self.rss = None
+        self.initial_rss = None
+        self.last_measured = 0.0
+
+    def record_load(self, seconds):
+        if len(self.baseline) < BASELINE_SAMPLES:
+            self.baseline.append(seconds)
+        self.load_times.append(seconds)
+
+    def record_error(self, error):
+        now = time.monotonic()
+        self.errors.append(now)
+        while self.errors and self.errors[0] < now - ERROR_WINDOW:
+            self.errors.popleft()
+        if is_fatal(error):
+            self.fatal = str(error).splitlines()[0]
+
+    def measure(self):
+        """Sample renderer memory (at most every HEALTH_INTERVAL) and ping the driver."""
+        now = time.monotonic()
+        if now - self.last_measured < HEALTH_INTERVAL:
+            return
+        self.last_measured = now
+        service = getattr(self.driver, "service", None)
+        process = getattr(service, "process", None)
+        self.rss = renderer_rss(getattr(process, "pid", None))
+        if self.rss and self.initial_rss is None:
+            self.initial_rss = self.rss
+        try:
+            self.driver.execute_script("return 1;")
+        except WebDriverException as e:
+            self.record_error(e)
+
+    def degraded_reason(self):
+        """Why the driver should be replaced, or None if it is healthy."""
+        if self.fatal:
+            return f"browser is gone ({self.fatal})"
+        if len(self.errors) >= MAX_ERRORS:
+            return f"{len(self.errors)} WebDriver errors in the last {ERROR_WINDOW:.0f} s"
+        if self.rss:
+            rss_mb = self.rss / 1024 / 1024
+            if rss_mb > MAX_RENDERER_RSS_MB:
+                return f"renderer memory at {rss_mb:.0f} MB"
+            if self.initial_rss and self.rss > self.initial_rss * RSS_GROWTH_FACTOR:
+                return f"renderer memory grew from {self.initial_rss / 1024 / 1024:.0f} MB to {rss_mb:.0f} MB"
+        if len(self.baseline) >= BASELINE_SAMPLES and len(self.load_times) >= BASELINE_SAMPLES + RECENT_SAMPLES:
+            baseline = statistics.median(self.baseline)
+            recent = statistics.median(list(self.load_times)[-RECENT_SAMPLES:])
+            if recent > baseline * LATENCY_DRIFT_FACTOR and recent - baseline > MIN_LATENCY_DRIFT:
+                return f"page loads slowed from {baseline * 1000:.0f} ms to {recent * 1000:.0f} ms"
+        return None
+
+
+class DriverSupervisor:
+    """
+    Keeps a standby driver warm and hands it over when the active one degrades.
+
+    `create_driver()` starts a new Chrome and `prepare(driver, session)` logs it in from a
+    session captured with `capture()` on the active driver just before the standby is built.
+    `verify(driver)` checks the standby is still logged in before it is handed over. All calls
+    on the active driver happen on the caller's thread; the standby is built on a background thread.
+    """
+
+    def __init__(self, create_driver, prepare, capture, verify=None, standby=True):
+        self.create_driver = create_driver
+        self.prepare = prepare
+        self.capture = capture
+        self.verify = verify
+        self.standby_enabled = standby
+        self.health = None
+        self.session = None
+        self.swaps = 0
+        self._standby = None
+        self._standby_failed_at = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="driver-standby")
+
+    def watch(self, driver):
+        """Start tracking a newly active (logged-in) driver."""
+        self.health = DriverHealth(driver)
+        self.session = self._current_session()
+
+    def _current_session(self):
+        """Session of the active driver, or the last one captured if the driver no longer answers."""
+        try:
+            return self.capture(self.health.driver)
+        except WebDriverException as e:
+            logger.warning(f"Could not capture the session of the active driver: {str(e)}")
+            return self.session
+
+    def ensure_standby(self):
+        if not self.standby_enabled or self._standby is not None:
+            return
+        if self._standby_failed_at and time.monotonic() - self._standby_failed_at < STANDBY_RETRY_INTERVAL:
+            return
+        # Cookies are rotated during a long wait, so copy the session as it is now
+        self.session = self._current_session()
+        if self.session is None:
+            return
+        with self._lock:
+            self._standby = self._pool.submit(self._build_standby, self.session)
+
+    def _build_standby(self, session):
+        start = time.perf_counter()
+        driver = self.create_driver()
+        try:
+            self.prepare(driver, session)
+        except Exception:
+            driver.quit()
+            raise
+        logger.info(f"Standby driver ready after {time.perf_counter() - start:.1f} s")
+        return driver
+
+    def record_load(self, seconds):
+        if self.health:
+            self.health.record_load(seconds)
+
+    def record_error(self, error):
+        if self.health:
+            self.health.record_error(error)
+
+    def check(self, build_standby=True):
+        """
+        Call between two checks. Returns a replacement driver if the active one degraded and a
+        standby was ready (or could be started), else None. With `build_standby` False no new
+        standby Chrome is started, e.g. while launching one would compete with the sale.
+        """
+        if self.health is None:
+            return None
+        if build_standby:
+            self.ensure_standby()
+        self.health.measure()
+        reason = self.health.degraded_reason()
+        if reason is None:
+            return None
+        return self._replace(reason)
+
+    def _replace(self, reason):
+        standby = self._take_standby(wait=self.health.fatal is not None)
+        if standby is not None and not self._logged_in(standby):
+            # Built a while ago and the session has expired since; the next check builds a fresh one
+            logger.warning("Standby driver is no longer logged in - discarding it")
+            self._pool.submit(self._recycle, standby)
+            standby = None
+        if standby is None:
+            if self.health.fatal is None:
+                # Degraded but still working - keep going until the standby is ready
+                logger.warning(f"Active driver degraded ({reason}), waiting for the standby driver")
+                return None
+            logger.error(f"Active driver failed ({reason}) and no standby is ready - starting a new one")
+            standby = self._build_standby(self._current_session())
+
+        old = self.health.driver
+        self.swaps += 1
+        logger.warning(f"Swapping to the standby driver ({reason}); swap #{self.swaps}")
+        self._pool.submit(self._recycle, old)
+        self.watch(standby)
+        return standby
+
+    def _logged_in(self, driver):
+        if self.verify is None:
+            return True
+        try:
+            return self.verify(driver)
+        except WebDriverException as e:
+            logger.warning(f"Could not check the standby driver's session: {str(e)}")
+            return False
+
+    def _take_standby(self, wait):
+        with self._lock:
+            future = self._standby
+            if future is None or (not wait and not future.done()):
+                return None
+            self._standby = None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Standby driver could not be started: {str(e)}")
+            self._standby_failed_at = time.monotonic()
+            return None
+
+    @staticmethod
+    def _recycle(driver):
+        try:
+            driver.quit()
+            logger.info("Recycled the old driver")
+        except Exception as e:
+            logger.warning(f"Error quitting the old driver: {str(e)}")
+
+    def shutdown(self):
+        """Quit the standby driver, if any, and stop the background thread."""
+        standby = self._take_standby(wait=True)
+        if standby is not None:
+            self._recycle(standby)
+        self._pool.shutdown(wait=True)
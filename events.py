@@ -0,0 +1,59 @@
+"""
+Event definitions - what to watch and buy. A single event comes from the constants in
+main.py; several events for the same account can be listed in a TOML file.
+"""
+
+import tomllib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+SALE_DATE_FORMAT = "%d.%m.%Y %H:%M"
+
+
+@dataclass
+class EventConfig:
+    """One event to watch, the ticket type to buy and when its sale is expected."""
+    name: str
+    url: str
+    ticket_type: str
+    max_quantity: int = 1
+    sale_date: Optional[str] = None
+    sale_timezone: str = "Europe/Zurich"
+    flow: Optional[str] = None  # Purchase flow file for a page layout that differs from purchase_flow.toml
+
+    def sale_datetime(self):
+        """Timezone-aware sale start, or None if no sale date is configured."""
+        if not self.sale_date:
+            return None
+        return datetime.strptime(self.sale_date, SALE_DATE_FORMAT).replace(tzinfo=ZoneInfo(self.sale_timezone))
+
+
+def load_events(path):
+    """
+    Read the [[events]] tables of a TOML file:
+
+        [[events]]
+        name = "partyboot-2025"
+        url = "https://eventfrog.ch/en/p/..."
+        ticket_type = "RAVE THE WAVE mit DJ SCHIFFJANONE (Ab 18J)"
+        max_quantity = 3
+        sale_date = "13.04.2025 19:00"
+    """
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    events = []
+    for index, entry in enumerate(data.get("events", []), start=1):
+        missing = [key for key in ("url", "ticket_type") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Event #{index} in {path} is missing {', '.join(missing)}")
+        entry.setdefault("name", f"event-{index}")
+        events.append(EventConfig(**entry))
+
+    names = [event.name for event in events]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate event names in {path}: {', '.join(sorted(duplicates))}")
+    return events
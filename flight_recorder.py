@@ -0,0 +1,128 @@
+"""
+Flight recorder - a ring buffer of the last page states the buyer saw (URL, timing,
+classification and, where the HTML is already at hand, a compressed DOM snapshot),
+dumped to disk only when the purchase flow gives up or a purchase attempt ends.
+
+Recording a frame costs no WebDriver round-trips: checks hand over what they already
+fetched and the compression runs on a background thread. Only a purchase flow that gave
+up takes an extra DOM snapshot (and optionally a screenshot) of the page it stopped on.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MIN_DUMP_INTERVAL = 10.0  # Seconds between two dumps with the same label, so a persistent error can't fill the disk
+
+
+class FlightRecorder:
+    """Keeps the last `capacity` page states in memory and writes them out on demand."""
+
+    def __init__(self, output_dir="flight", capacity=50, screenshots=False):
+        self.output_dir = output_dir
+        self.screenshots = screenshots
+        self.frames = deque(maxlen=capacity)
+        self._origin = time.perf_counter()
+        self._last_html = None
+        self._last_html_frame = None
+        self._last_dump = {}
+        self._dumps = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flight-recorder")
+
+    def record(self, label, url=None, duration=None, status=None, html=None, screenshot=None, **details):
+        """Add a frame. `html` is compressed in the background; pass it only if it is already in memory."""
+        frame = {
+            "time": time.time(),
+            "offset_ms": round((time.perf_counter() - self._origin) * 1000, 3),
+            "label": label,
+            "url": url,
+            "duration_ms": round(duration * 1000, 3) if duration is not None else None,
+            "status": status,
+            "details": details,
+            "dom": None,
+            "same_dom_as": None,
+            "screenshot": screenshot,
+        }
+        with self._lock:
+            self.frames.append(frame)
+            if html is None:
+                return frame
+            if html is self._last_html:
+                # An unchanged page (e.g. a 304 from the probe) shares the earlier snapshot
+                frame["same_dom_as"] = self._last_html_frame
+                return frame
+            self._last_html = html
+            self._last_html_frame = frame
+        self._pool.submit(self._compress, frame, html)
+        return frame
+
+    @staticmethod
+    def _compress(frame, html):
+        frame["dom"] = gzip.compress(html.encode("utf-8"), compresslevel=5)
+
+    def capture(self, driver, label, **details):
+        """Snapshot the driver's current page (DOM and optional screenshot). Meant for failures, not the hot path."""
+        start = time.perf_counter()
+        try:
+            url = driver.current_url
+            html = driver.page_source
+            screenshot = driver.get_screenshot_as_png() if self.screenshots else None
+        except Exception as e:
+            logger.warning(f"Flight recorder could not capture the page: {str(e)}")
+            return self.record(label, status="capture_failed", error=str(e), **details)
+        return self.record(label, url, time.perf_counter() - start, html=html, screenshot=screenshot, **details)
+
+    def dump(self, label):
+        """Write the buffered frames to `<output_dir>/<label>-<timestamp>-<n>/` in the background."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_dump.get(label, float("-inf")) < MIN_DUMP_INTERVAL:
+                return None
+            self._last_dump[label] = now
+            self._dumps += 1
+            frames = list(self.frames)
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.output_dir, f"{label}-{timestamp}-{self._dumps}")
+        # Queued behind pending compressions, so every frame has its DOM by the time it is written
+        return self._pool.submit(self._write, path, frames)
+
+    def _write(self, path, frames):
+        try:
+            os.makedirs(path, exist_ok=True)
+            index = []
+            dom_files = {}
+            for number, frame in enumerate(frames, start=1):
+                entry = {key: value for key, value in frame.items() if key not in ("dom", "same_dom_as", "screenshot")}
+                name = f"{number:03d}-{frame['label']}"
+                source = frame["same_dom_as"] or frame
+                if id(source) in dom_files:
+                    entry["dom"] = dom_files[id(source)]
+                elif source["dom"] is not None:
+                    entry["dom"] = dom_files[id(source)] = f"{name}.html.gz"
+                    with open(os.path.join(path, entry["dom"]), "wb") as f:
+                        f.write(source["dom"])
+                if frame["screenshot"] is not None:
+                    entry["screenshot"] = f"{name}.png"
+                    with open(os.path.join(path, entry["screenshot"]), "wb") as f:
+                        f.write(frame["screenshot"])
+                index.append(entry)
+            with open(os.path.join(path, "frames.json"), "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2)
+            logger.info(f"Wrote flight recording with {len(frames)} page states to {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"Error writing flight recording {path}: {str(e)}")
+            return None
+
+    def close(self):
+        """Finish pending dumps."""
+        self._pool.shutdown(wait=True)
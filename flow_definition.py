@@ -0,0 +1,113 @@
+"""
+Declarative purchase flows - the steps of a purchase (which element to act on, what to
+do with it and which elements mean the step went through or failed) are read from a TOML
+file, so another event with a different page layout only needs another file.
+"""
+
+import logging
+import tomllib
+from dataclasses import dataclass, field
+from typing import Optional
+
+from purchase_flow import DONE, STATES
+
+logger = logging.getLogger(__name__)
+
+CONDITIONS = ("present", "visible", "clickable")
+
+
+@dataclass
+class StepDefinition:
+    """
+    One transition of the purchase state machine.
+
+    The step waits for `require` and `target` (locator groups), runs `action` on the target
+    and then waits for whichever comes first: a `success` group (the step went through) or
+    an `error` group (`on_error` decides the next state). `timeout` caps every wait of the
+    step until enough runs have been measured to tune it; `error_window` is how long a step
+    with error groups but no success groups looks for an error before it counts as done.
+    """
+    name: str
+    from_state: str
+    to_state: str
+    action: str = "click"
+    target: Optional[str] = None
+    condition: str = "clickable"
+    require: list = field(default_factory=list)
+    success: list = field(default_factory=list)
+    error: list = field(default_factory=list)
+    on_error: Optional[str] = None
+    timeout: float = 10.0
+    error_window: float = 3.0
+
+
+@dataclass
+class FlowDefinition:
+    steps: list
+    locators: dict = field(default_factory=dict)
+
+    def by_state(self):
+        return {step.from_state: step for step in self.steps}
+
+
+def load_flow(path, known_groups=()):
+    """
+    Read a purchase flow from a TOML file:
+
+        [locators]
+        cart_page = ["//h1[contains(text(), 'Cart')]"]
+
+        [[steps]]
+        name = "add_to_cart"
+        from = "selected"
+        to = "in_cart"
+        target = "add_to_cart"
+        success = ["cart_page"]
+        error = ["error_banner"]
+        on_error = "reduce_quantity"
+
+    Locator groups must exist in `known_groups` or in the file's [locators] table.
+    """
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    locators = data.get("locators", {})
+    for group, xpaths in locators.items():
+        if not isinstance(xpaths, list) or not all(isinstance(xpath, str) for xpath in xpaths):
+            raise ValueError(f"Locator group {group} in {path} must be a list of XPaths")
+    groups = set(known_groups) | set(locators)
+
+    steps = []
+    for index, entry in enumerate(data.get("steps", []), start=1):
+        entry = dict(entry)
+        missing = [key for key in ("name", "from", "to") if not entry.get(key)]
+        if missing:
+            raise ValueError(f"Step #{index} in {path} is missing {', '.join(missing)}")
+        entry["from_state"] = entry.pop("from")
+        entry["to_state"] = entry.pop("to")
+        try:
+            step = StepDefinition(**entry)
+        except TypeError as e:
+            raise ValueError(f"Step {entry['name']} in {path}: {str(e)}") from None
+
+        for state in (step.from_state, step.to_state):
+            if state not in STATES:
+                raise ValueError(f"Step {step.name} in {path} uses unknown state {state}")
+        if step.condition not in CONDITIONS:
+            raise ValueError(f"Step {step.name} in {path} has unknown condition {step.condition}")
+        unknown = [group for group in [step.target, *step.require, *step.success, *step.error]
+                   if group and group not in groups]
+        if unknown:
+            raise ValueError(f"Step {step.name} in {path} uses unknown locator groups {', '.join(unknown)}")
+        if step.error and not step.success:
+            logger.warning(f"Step {step.name} has no success condition - every purchase waits up to "
+                           f"{step.error_window:.1f} s for an error to show up")
+        steps.append(step)
+
+    states = [step.from_state for step in steps]
+    duplicates = {state for state in states if states.count(state) > 1}
+    if duplicates:
+        raise ValueError(f"Several steps in {path} start from {', '.join(sorted(duplicates))}")
+    if not any(step.to_state == DONE for step in steps):
+        raise ValueError(f"No step in {path} reaches {DONE}")
+    return FlowDefinition(steps, locators)
@@ -0,0 +1,234 @@
+"""
+Availability from the event page's own inventory API - DevTools network events are read
+from Chrome's performance log and the JSON response for the ticket type is classified
+as soon as it arrives, without waiting for the page to render it.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+
+from availability import ON_SALE, PRE_SALE, SOLD_OUT, UNKNOWN, Classification
+
+logger = logging.getLogger(__name__)
+
+# Responses worth parsing. Only JSON responses are considered at all.
+INVENTORY_URL_PATTERNS = ["*/api/*", "*ticket*", "*inventory*"]
+
+# Keys that carry the name of a ticket type in an inventory payload
+NAME_KEYS = ("name", "title", "label", "displayName", "ticketTypeName", "ticket_type")
+
+SOLD_OUT_VALUES = {"sold_out", "soldout", "sold-out", "unavailable", "exhausted"}
+PRE_SALE_VALUES = {"presale", "pre_sale", "pre-sale", "not_started", "upcoming", "scheduled", "coming_soon"}
+ON_SALE_VALUES = {"available", "on_sale", "onsale", "open", "active", "bookable"}
+
+
+def enable_network_events(chrome_options):
+    """Ask chromedriver to record DevTools network events in the performance log."""
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def find_ticket_entry(payload, ticket_type):
+    """The first object in a JSON payload whose name field matches the ticket type, or None."""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key in NAME_KEYS:
+                value = node.get(key)
+                if isinstance(value, str) and value.strip() == ticket_type:
+                    return node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+    return None
+
+
+def _parse_time(value):
+    if isinstance(value, (int, float)):
+        # Epoch seconds or milliseconds
+        return value / 1000 if value > 1e11 else value
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return None
+
+
+def classify_inventory(payload, ticket_type, now=None):
+    """
+    Decide availability from an inventory payload. Returns a Classification, or None if
+    the payload does not mention the ticket type.
+    """
+    entry = find_ticket_entry(payload, ticket_type)
+    if entry is None:
+        return None
+    now = time.time() if now is None else now
+
+    for key in ("soldOut", "sold_out", "isSoldOut"):
+        if entry.get(key) is True:
+            return Classification(SOLD_OUT, f"inventory {key}=true")
+
+    for key in ("status", "state", "availability", "saleStatus"):
+        value = entry.get(key)
+        if isinstance(value, str):
+            normalized = value.strip().lower().replace(" ", "_")
+            if normalized in SOLD_OUT_VALUES:
+                return Classification(SOLD_OUT, f"inventory {key}={value}")
+            if normalized in PRE_SALE_VALUES:
+                return Classification(PRE_SALE, f"inventory {key}={value}")
+            if normalized in ON_SALE_VALUES:
+                return Classification(ON_SALE, f"inventory {key}={value}")
+
+    for key in ("saleStart", "salesStart", "sale_start", "onSaleFrom"):
+        start = _parse_time(entry.get(key))
+        if start is not None and start > now:
+            return Classification(PRE_SALE, f"inventory {key}={entry[key]}")
+
+    for key in ("remaining", "available_quantity", "availableQuantity", "quantityAvailable", "stock"):
+        value = entry.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if value > 0:
+                return Classification(ON_SALE, f"inventory {key}={value}")
+            return Classification(SOLD_OUT, f"inventory {key}={value}")
+
+    for key in ("available", "isAvailable", "onSale", "bookable"):
+        value = entry.get(key)
+        if isinstance(value, bool):
+            return Classification(ON_SALE if value else SOLD_OUT, f"inventory {key}={str(value).lower()}")
+
+    return Classification(UNKNOWN, "inventory entry without availability fields")
+
+
+class NetworkInventoryWatcher:
+    """
+    Follows the network events of the driver's performance log and classifies the newest
+    inventory response that mentions the ticket type.
+    """
+
+    def __init__(self, driver, ticket_type, url_patterns=None):
+        self.driver = driver
+        self.ticket_type = ticket_type
+        self.url_patterns = url_patterns or INVENTORY_URL_PATTERNS
+        self.candidates = {}
+        self.last = None
+
+    def enable(self):
+        self.driver.execute_cdp_cmd("Network.enable", {})
+
+    def clear(self):
+        """Drop everything logged so far, e.g. before navigating to the event page again."""
+        self.driver.get_log("performance")
+        self.candidates = {}
+
+    def _is_inventory(self, response):
+        if "json" not in (response.get("mimeType") or ""):
+            return False
+        url = response.get("url", "")
+        return any(fnmatch(url, pattern) for pattern in self.url_patterns)
+
+    def poll(self):
+        """
+        Read new network events. Returns the Classification of the newest inventory response
+        that decided, else None. A page often refetches its inventory, and the log is drained
+        on every read, so an older response in the same batch must not win over a newer one.
+        """
+        finished = []
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived" and self._is_inventory(params.get("response", {})):
+                self.candidates[params["requestId"]] = params["response"]["url"]
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.candidates:
+                finished.append(params["requestId"])
+
+        # Newest first; a response without availability fields only counts if nothing else decided
+        decision = None
+        for request_id in reversed(finished):
+            result = self._classify_response(request_id)
+            if result is None:
+                continue
+            if result.status != UNKNOWN:
+                decision = result
+                break
+            decision = decision or result
+        # Older responses are superseded, their bodies are never read
+        for request_id in finished:
+            self.candidates.pop(request_id, None)
+        if decision is not None:
+            self.last = decision
+        return decision
+
+    def _classify_response(self, request_id):
+        url = self.candidates.pop(request_id)
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            payload = json.loads(body["body"])
+        except Exception as e:
+            logger.warning(f"Could not read inventory response {url}: {str(e)}")
+            return None
+        decision = classify_inventory(payload, self.ticket_type)
+        if decision is not None:
+            logger.info(f"Inventory response {url}: {decision.status} ({decision.reason})")
+        return decision
+
+    def wait(self, timeout):
+        """Poll until an inventory response decided or the timeout passed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            decision = self.poll()
+            if decision is not None or time.monotonic() >= deadline:
+                return decision
+            time.sleep(0.02)
+
+
+def record_network_log(driver, path):
+    """
+    Save the performance log and the bodies of all JSON responses in it, for replaying
+    with RecordedNetworkLog. Call after loading the event page with network events enabled.
+    """
+    entries = driver.get_log("performance")
+    bodies = {}
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        if message.get("method") != "Network.responseReceived":
+            continue
+        response = message["params"]["response"]
+        if "json" in (response.get("mimeType") or ""):
+            request_id = message["params"]["requestId"]
+            try:
+                bodies[request_id] = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception as e:
+                logger.warning(f"No body recorded for {response.get('url')}: {str(e)}")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"performance": entries, "bodies": bodies}, f, indent=2)
+
+
+class RecordedNetworkLog:
+    """Replays a recorded performance log in place of a driver, so the watcher runs offline."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            recording = json.load(f)
+        self.entries = recording["performance"]
+        self.bodies = recording["bodies"]
+
+    def get_log(self, log_type):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.getResponseBody":
+            return self.bodies[params["requestId"]]
+        return {}
@@ -0,0 +1,199 @@
+"""
+Central selector registry - every XPath the buyer uses, grouped by what it locates.
+Records which locator actually matched, persists the hit statistics across runs and
+tries the historically winning locator first.
+"""
+
+import json
+import logging
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from atomic_file import atomic_write
+from waits import xpath_literal
+
+logger = logging.getLogger(__name__)
+
+# Alternatives per group, in the default order they are tried.
+# `{ticket_type}` is filled in with an XPath string literal at lookup time.
+LOCATORS = {
+    "buy_button": [
+        "//button[contains(text(), 'Buy')]",
+        "//button[contains(text(), 'Purchase')]",
+        "//button[contains(text(), 'Get tickets')]",
+    ],
+    "sale_not_open": [
+        "//div[contains(text(), 'Ticket sale online starts on')]",
+    ],
+    "ticket_row": [
+        "//div[contains(text(), {ticket_type})]",
+    ],
+    "quantity_input": [
+        "//input[@type='number']",
+    ],
+    "error_banner": [
+        "//div[contains(@class, 'error') or contains(@class, 'alert')]",
+    ],
+    "add_to_cart": [
+        "//button[contains(text(), 'Add to cart')]",
+        "//button[contains(text(), 'Continue')]",
+    ],
+    "checkout": [
+        "//button[contains(text(), 'Checkout')]",
+        "//button[contains(text(), 'Proceed to payment')]",
+    ],
+    "email_field": [
+        "//*[@id='email']",
+    ],
+    "continue": [
+        "//button[contains(text(), 'Continue')]",
+        "//button[contains(text(), 'Next')]",
+    ],
+    "terms_checkbox": [
+        "//input[@type='checkbox']",
+    ],
+    "complete_purchase": [
+        "//button[contains(text(), 'Complete purchase')]",
+        "//button[contains(text(), 'Pay now')]",
+    ],
+    "login_form": [
+        "//*[@id='username']",
+    ],
+    "cookie_consent": [
+        "//button[contains(text(), 'Accept') or contains(text(), 'Agree') or contains(text(), 'OK')]",
+        "//a[contains(text(), 'Accept') or contains(text(), 'Agree') or contains(text(), 'OK')]",
+        "//button[contains(@class, 'accept') or contains(@class, 'agree')]",
+        "//button[@id='accept-cookies']",
+        "//button[@id='acceptCookies']",
+    ],
+    "logged_in": [
+        "//a[contains(@href, 'logout')]",
+        "//div[contains(@class, 'user-menu')]",
+        "//span[contains(text(), 'My Account')]",
+        "//a[contains(@href, 'account')]",
+        "//a[contains(text(), 'My Profile')]",
+    ],
+}
+
+SAVE_INTERVAL = 5.0  # Seconds between writes of the statistics file
+
+
+class SelectorRegistry:
+    """Looks up elements by group name, learning which locator of each group works."""
+
+    def __init__(self, path="selector_stats.json", locators=None, race=True):
+        self.path = path
+        self.locators = locators or LOCATORS
+        self.race = race
+        self.pinned = {}
+        self.stats = self._load()
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable selector statistics {self.path}: {str(e)}")
+            return {}
+
+    def save(self, force=True):
+        if not self.path or not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        try:
+            atomic_write(self.path, json.dumps(self.stats, indent=2, sort_keys=True))
+        except OSError as e:
+            # Statistics are a nice-to-have - never let a failed write break a purchase step
+            logger.warning(f"Error saving selector statistics {self.path}: {str(e)}")
+            return
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _entry(self, group, template):
+        return self.stats.setdefault(group, {}).setdefault(template, {"hits": 0, "misses": 0})
+
+    def ordered(self, group):
+        """Locator templates of a group, historically winning ones first."""
+        templates = self.locators[group]
+        group_stats = self.stats.get(group, {})
+
+        def score(template):
+            entry = group_stats.get(template, {})
+            return entry.get("hits", 0) - entry.get("misses", 0) * 0.01
+
+        # sorted() is stable, so ties keep the default order
+        return sorted(templates, key=score, reverse=True)
+
+    def pin(self, group, xpath):
+        """
+        Try an exact XPath recorded from the live page (e.g. an element's id) before the
+        group's locators, or stop doing so with None. Pins are not persisted.
+        """
+        if xpath:
+            self.pinned[group] = xpath
+        else:
+            self.pinned.pop(group, None)
+
+    def xpaths(self, group, **params):
+        """Ordered XPaths of a group with their parameters filled in, a pinned XPath first."""
+        quoted = {name: xpath_literal(str(value)) for name, value in params.items()}
+        pinned = [self.pinned[group]] if group in self.pinned else []
+        return pinned + [template.format(**quoted) for template in self.ordered(group)]
+
+    def record(self, group, index):
+        """Count a match of the index-th XPath of `xpaths()` and a miss for every locator tried before it."""
+        if group in self.pinned:
+            if index == 0:
+                # The pinned XPath matched - it says nothing about the locators
+                return
+            index -= 1
+        templates = self.ordered(group)
+        for missed in templates[:index]:
+            self._entry(group, missed)["misses"] += 1
+        entry = self._entry(group, templates[index])
+        entry["hits"] += 1
+        entry["last_hit"] = time.time()
+        self._dirty = True
+        self.save(force=False)
+
+    def locate(self, waiter, group, timeout=10, condition="present", **params):
+        """Wait for the first locator of a group to match. Returns (matching XPath, element)."""
+        xpaths = self.xpaths(group, **params)
+        if self.race:
+            # All locators in one script call, evaluated in learned order
+            index, element = waiter.first(xpaths, timeout, condition)
+        else:
+            index, element = self._wait_sequentially(waiter, xpaths, timeout, condition)
+        self.record(group, index)
+        return xpaths[index], element
+
+    def wait(self, waiter, group, timeout=10, condition="present", **params):
+        """Wait for the first locator of a group to match and return the element."""
+        return self.locate(waiter, group, timeout, condition, **params)[1]
+
+    def _wait_sequentially(self, waiter, xpaths, timeout, condition):
+        deadline = time.monotonic() + timeout
+        while True:
+            for index, xpath in enumerate(xpaths):
+                try:
+                    return index, waiter.element(xpath, 0, condition)
+                except TimeoutException:
+                    continue
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Timed out after {timeout}s waiting for {' | '.join(xpaths)}")
+            time.sleep(0.05)
+
+    def find(self, waiter, group, condition="present", **params):
+        """Look up a group once without waiting. Returns None if nothing matches."""
+        try:
+            return self.wait(waiter, group, 0, condition, **params)
+        except TimeoutException:
+            return None
+
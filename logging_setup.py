@@ -0,0 +1,185 @@
+"""
+Non-blocking logging pipeline - log calls only put records on a queue; a background
+listener collapses repeated messages into counters and writes JSONL with size-based rotation.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+CONSOLE_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _numbers(message):
+    return [float(number) if "." in number else int(number) for number in _NUMBERS.findall(message)]
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        repeat = getattr(record, "repeat", None)
+        if repeat:
+            entry["repeat"] = repeat
+            entry["first_ts"] = datetime.fromtimestamp(record.repeat_first).isoformat(timespec="milliseconds")
+        numbers = getattr(record, "repeat_numbers", None)
+        if numbers:
+            entry["numbers"] = numbers
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RepeatCollapsingHandler(logging.Handler):
+    """
+    Forwards a message the first time it is seen and only counts its repeats afterwards.
+    Messages that differ only in numbers (check counters, timestamps, durations) count as
+    repeats. Every `flush_interval` seconds the counters are written out as one summary
+    record per message, e.g. "Tickets are not yet available. Will check again. (x 3412)".
+    Numbers that varied between the repeats are shown as their range, e.g. "HTTP probe
+    answered in 12..48 ms (x 200)", and the summary record keeps min, max and last value
+    of each. Errors are never collapsed.
+    """
+
+    def __init__(self, targets, flush_interval=10.0):
+        super().__init__()
+        self.targets = targets
+        self.flush_interval = flush_interval
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def _forward(self, record):
+        for target in self.targets:
+            if record.levelno >= target.level:
+                target.handle(record)
+
+    def emit(self, record):
+        if record.levelno >= logging.ERROR:
+            self._forward(record)
+        else:
+            message = record.getMessage()
+            key = (record.name, record.levelno, _NUMBERS.sub("#", message))
+            entry = self.pending.get(key)
+            if entry is None:
+                self.pending[key] = {"count": 0, "first": None, "last": None}
+                self._forward(record)
+            else:
+                # Same template, so the same count of numbers in the same places
+                numbers = _numbers(message)
+                if entry["count"] == 0:
+                    entry["first"] = record.created
+                    entry["min"], entry["max"] = numbers, numbers
+                else:
+                    entry["min"] = list(map(min, entry["min"], numbers))
+                    entry["max"] = list(map(max, entry["max"], numbers))
+                entry["count"] += 1
+                entry["last"] = record
+
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write one summary record per repeated message and start counting again."""
+        self.last_flush = time.monotonic()
+        for key, entry in list(self.pending.items()):
+            if entry["count"] == 0:
+                # Nothing repeated since the last flush - forget it so the next one is shown again
+                del self.pending[key]
+                continue
+            last = entry["last"]
+            message = last.getMessage()
+            values = _NUMBERS.findall(message)
+            ranges = [{"min": low, "max": high, "last": value}
+                      for low, high, value in zip(entry["min"], entry["max"], _numbers(message))]
+            if any(numbers["min"] != numbers["max"] for numbers in ranges):
+                # Keep the text of unchanged numbers, show the others as min..max
+                parts = _NUMBERS.split(message)
+                message = parts[0] + "".join(
+                    (value if numbers["min"] == numbers["max"] else f"{numbers['min']}..{numbers['max']}") + part
+                    for value, numbers, part in zip(values, ranges, parts[1:]))
+            else:
+                ranges = None
+            summary = logging.makeLogRecord(last.__dict__)
+            summary.msg = f"{message} (x {entry['count']})"
+            summary.args = None
+            summary.repeat = entry["count"]
+            summary.repeat_first = entry["first"]
+            summary.repeat_numbers = ranges
+            self._forward(summary)
+            entry["count"] = 0
+        for target in self.targets:
+            target.flush()
+
+
+class _FlushingListener(logging.handlers.QueueListener):
+    """QueueListener that also flushes the collapsed counters while the queue is idle."""
+
+    def __init__(self, log_queue, collapser):
+        super().__init__(log_queue, collapser, respect_handler_level=False)
+        self.collapser = collapser
+        self._ticker = None
+        self._stopping = threading.Event()
+
+    def start(self):
+        super().start()
+        self._ticker = threading.Thread(target=self._tick, name="log-flush", daemon=True)
+        self._ticker.start()
+
+    def _tick(self):
+        while not self._stopping.wait(self.collapser.flush_interval):
+            # Hand the flush to the listener thread so handlers are only used from one thread
+            self.queue.put_nowait(_FLUSH)
+
+    def handle(self, record):
+        if record is _FLUSH:
+            self.collapser.flush()
+        else:
+            super().handle(record)
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        super().stop()
+        self.collapser.flush()
+
+
+_FLUSH = logging.makeLogRecord({"msg": "flush"})
+
+
+def setup_logging(path="ticket_buyer.jsonl", level=logging.INFO, max_bytes=10 * 1024 * 1024,
+                  backup_count=5, flush_interval=10.0):
+    """Route all logging through a queue to a background JSONL writer and the console."""
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                        encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    collapser = RepeatCollapsingHandler([file_handler, console_handler], flush_interval)
+    log_queue = queue.SimpleQueue()
+    listener = _FlushingListener(log_queue, collapser)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -3,213 +3,591 @@
 Eventfrog Ticket Buyer - Automated ticket purchasing script for Chilbi Gersau - Partyboot 2025
 """
 
+import argparse
+import functools
 import time
 import logging
 import os
 from datetime import datetime
+from urllib.parse import urljoin
 from dotenv import load_dotenv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver import ActionChains
+import availability
+import browser_profile
+from availability import classify_page_state
+from checkpoint import CheckpointStore
+from backoff import AdaptivePolling, CircuitBreaker, PollBackoff
+from logging_setup import setup_logging
+from metrics import BuyerMetrics, MetricsServer
+from locators import LOCATORS, SelectorRegistry
+import purchase_flow
+from driver_health import DriverSupervisor
+from events import EventConfig
+from flight_recorder import FlightRecorder
+from flow_definition import load_flow
+from inventory import NetworkInventoryWatcher, enable_network_events
+from page_state import read_page_state
+from purchase_flow import PurchaseFlow, permitted_quantity_from_text
+from probe import AvailabilityProbe, create_pool
+from session_cache import SessionCache, capture_session, inject_session, is_logged_in
+from scheduler import ClockOffsetEstimator, SaleScheduler
+from startup import StartupTimer, run_parallel, warm_up_connection
+from step_timings import StepTimings
+from tracing import Tracer, traced
+from waits import DomWaiter
+from warm_path import find_quantity_input, precache_assets, record_ticket_row, select_ticket
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("ticket_buyer.log"),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: a background thread writes JSONL and collapses repeated messages into counters
+LOG_FILE = "ticket_buyer.jsonl"
+setup_logging(LOG_FILE)
 logger = logging.getLogger(__name__)
-
-# Print a message to confirm the script is starting
-print("Script is starting - initializing logging...")
 logger.info("Logging initialized")
 
 # Constants
-EVENT_URL = "https://eventfrog.ch/en/p/concert/other-music-genres/chilbi-gersau-partyboot-2025-7295184020190557758.html"
+BASE_URL = "https://eventfrog.ch"
+LOGIN_URL = f"{BASE_URL}/en/login.html"
+EVENT_URL = f"{BASE_URL}/en/p/concert/other-music-genres/chilbi-gersau-partyboot-2025-7295184020190557758.html"
 TICKET_TYPE = "RAVE THE WAVE mit DJ SCHIFFJANONE (Ab 18J)"
 MAX_TICKET_QUANTITY = 3
 REFRESH_INTERVAL = 0.1  # Refresh interval in seconds
+MAX_STEP_RETRIES = 2  # Retries of a failed purchase step in place before giving up on the attempt
+MAX_FLOW_RESTARTS = 1  # Full reloads of the event page per purchase attempt after a step gave up
 SALE_DATE = "13.04.2025 19:00"  # Expected sale date and time
+SALE_TIMEZONE = "Europe/Zurich"  # Timezone SALE_DATE is given in
+SALE_WINDOW_BEFORE = 10  # Start polling at REFRESH_INTERVAL this many seconds before the sale
+SALE_WINDOW_AFTER = 60  # Keep polling at REFRESH_INTERVAL this many seconds after the sale
+MAX_POLL_INTERVAL = 30  # Longest wait between checks while the sale is still far away
+PROBE_MODE = "http"  # "http" polls with a keep-alive HTTP client, "browser" reloads the page in Chrome
+SESSION_CACHE_FILE = ".session_cache"  # Encrypted login session reused across restarts (None disables it)
+SELECTOR_STATS_FILE = "selector_stats.json"  # Which locators matched in past runs, tried first next time
+PURCHASE_FLOW_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "purchase_flow.toml")  # Steps of the purchase
+STEP_TIMINGS_FILE = "step_timings.json"  # Step latencies of past runs the purchase timeouts are tuned from
+RACE_SELECTORS = True  # Try all locators of a group in a single script call instead of one by one
+TRACE_DIR = "traces"  # Where purchase-attempt timelines (Chrome trace JSON) are written
+CHECKPOINT_FILE = ".checkpoint"  # Encrypted run state written after every purchase state transition (None disables it)
+CHECKPOINT_MAX_AGE = 1800  # Checkpoints older than this many seconds are not resumed (carts expire anyway)
+MAX_PURCHASE_RETRIES = 3  # Failed purchase attempts before giving up
+FLIGHT_RECORDER_DIR = "flight"  # Where the last page states are written after a failed step or a purchase attempt
+FLIGHT_RECORDER_FRAMES = 50  # Page states kept in memory
+FLIGHT_RECORDER_SCREENSHOTS = False  # Also take a screenshot of the page a step failed on
+NETWORK_INVENTORY = False  # Decide availability from the page's own inventory API responses (DevTools network events)
+INVENTORY_WAIT = 1.0  # Longest wait in seconds for the inventory response after loading the event page
+STANDBY_DRIVER = True  # Keep a second logged-in Chrome warm and swap to it when the active one degrades
+METRICS_HOST = "127.0.0.1"  # Interface the /metrics endpoint listens on
+METRICS_PORT = 9108  # Port of the Prometheus /metrics endpoint (None disables it)
+MAX_BACKOFF = 10.0  # Longest wait in seconds between checks while the server answers 429/5xx or slows down
+BREAKER_FAILURES = 5  # Failed checks in a row after which checks pause (circuit breaker)
+BREAKER_OPEN_TIME = 1.0  # First pause in seconds before a trial check; doubles while the trials fail ...
+BREAKER_MAX_OPEN_TIME = 8.0  # ... up to this long
+WARM_PATH = True  # Record the ticket row and pre-load checkout assets while waiting, select with one script call at the flip
+WARM_UP_INTERVAL = 600  # Seconds between two warm-ups while the sale is closed (outside the fast-polling window)
+WARM_UP_BUDGET = 15  # Longest a warm-up may take; none starts when the fast-polling window opens sooner than that
+WARM_UP_PATHS = ("/cart", "/checkout")  # Pages of the purchase route whose static assets are pre-loaded
+
+# Browser profile from .env file: "normal" (visible Chrome) or "fast" (headless, eager, blocked heavy resources)
+BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "normal")
+HEADLESS = os.getenv("HEADLESS", "1") != "0"  # Only used by the fast profile
+EXTRA_BLOCKED_URL_PATTERNS = [p for p in os.getenv("BLOCKED_URL_PATTERNS", "").split(",") if p]
 
 # Login credentials from .env file
 LOGIN_EMAIL = os.getenv("EMAIL")
 LOGIN_PASSWORD = os.getenv("PASSWORD")
 
+
+def _cookie_values(cookies):
+    return {(cookie["name"], cookie.get("domain"), cookie.get("path"), cookie["value"]) for cookie in cookies}
+
+
 class EventfrogTicketBuyer:
-    def __init__(self):
+    def __init__(self, event=None, clock=None, resume=False, instance=None, metrics_port=None):
+        """
+        `instance` names a buyer that shares the process with others (the multi-event watcher):
+        its checkpoint, selector statistics, step timings, traces and flight recordings get
+        their own paths. `metrics_port` overrides METRICS_PORT.
+        """
+        self.instance = instance
+        self.metrics_port = METRICS_PORT if metrics_port is None else metrics_port
+        self.event = event or EventConfig(
+            name="default",
+            url=EVENT_URL,
+            ticket_type=TICKET_TYPE,
+            max_quantity=MAX_TICKET_QUANTITY,
+            sale_date=SALE_DATE,
+            sale_timezone=SALE_TIMEZONE,
+        )
         self.driver = None
-        print("Initializing EventfrogTicketBuyer...")
+        self.waiter = None
+        self.flow = load_flow(self.event.flow or PURCHASE_FLOW_FILE, LOCATORS)
+        self.selectors = SelectorRegistry(self._instance_file(SELECTOR_STATS_FILE), {**LOCATORS, **self.flow.locators},
+                                          race=RACE_SELECTORS)
+        self.step_timings = StepTimings(self._instance_file(STEP_TIMINGS_FILE))
+        self.tracer = Tracer(self._instance_dir(TRACE_DIR))
+        self.recorder = FlightRecorder(self._instance_dir(FLIGHT_RECORDER_DIR), FLIGHT_RECORDER_FRAMES,
+                                       FLIGHT_RECORDER_SCREENSHOTS)
+        self.probe = None
+        self.inventory = None
+        self.page_state = None
+        self.ticket_plan = None
+        self.http = create_pool()
+        self.clock = clock or ClockOffsetEstimator()
+        self.scheduler = None
+        self.polling = AdaptivePolling(
+            PollBackoff(base_delay=REFRESH_INTERVAL, max_delay=MAX_BACKOFF),
+            CircuitBreaker(BREAKER_FAILURES, BREAKER_OPEN_TIME, BREAKER_MAX_OPEN_TIME),
+        )
+        self.startup = StartupTimer()
+        self.preloaded_session = None
+        self.resume = resume
+        self.resume_checkpoint = None
+        self.checkpoints = self._checkpoint_store()
+        self.checkpoint_session = None
+        self.failed_step = None
+        self.check_count = 0
+        self.retries = 0
+        self.supervisor = DriverSupervisor(self._create_driver, self._prepare_standby, capture_session,
+                                           self._standby_logged_in, standby=STANDBY_DRIVER)
+        self.metrics = BuyerMetrics(self)
+        self.metrics_server = None
         logger.info("Initializing EventfrogTicketBuyer instance")
         try:
-            self.setup_driver()
-            self.current_ticket_quantity = MAX_TICKET_QUANTITY
+            self.current_ticket_quantity = self.event.max_quantity
+            self.purchase_state = purchase_flow.START
+            self.purchase_flow = self._build_purchase_flow()
+            
+            # Launch Chrome while the connection to Eventfrog is warmed up and the cached session is checked
+            results = run_parallel(self.startup, {
+                "driver": self.setup_driver,
+                "network": self._warm_up_network,
+                "session": self._preload_session,
+            })
+            if isinstance(results["driver"], Exception):
+                raise results["driver"]
+            self.startup.report()
             logger.info("EventfrogTicketBuyer initialized successfully")
         except Exception as e:
-            print(f"Error during initialization: {str(e)}")
             logger.error(f"Error during initialization: {str(e)}")
             raise
         
     def setup_driver(self):
         """Initialize the Chrome WebDriver with appropriate options."""
+        self._attach_driver(self._create_driver())
+    
+    def _create_driver(self):
+        """Start a Chrome WebDriver with appropriate options. Also used for standby drivers."""
         try:
-            print("Setting up Chrome WebDriver...")
             logger.info("Setting up Chrome WebDriver")
             
             chrome_options = Options()
-            # Uncomment the line below if you want to run in headless mode
-            # chrome_options.add_argument("--headless")
             chrome_options.add_argument("--window-size=1920,1080")
             chrome_options.add_argument("--disable-notifications")
+            browser_profile.configure_options(chrome_options, BROWSER_PROFILE, headless=HEADLESS)
+            logger.info(f"Using '{BROWSER_PROFILE}' browser profile")
+            if NETWORK_INVENTORY:
+                enable_network_events(chrome_options)
             
-            print("Creating Chrome WebDriver instance...")
             logger.info("Creating Chrome WebDriver instance")
-            self.driver = webdriver.Chrome(options=chrome_options)
+            driver = webdriver.Chrome(options=chrome_options)
             
-            print("Maximizing window...")
-            logger.info("Maximizing window")
-            self.driver.maximize_window()
+            if BROWSER_PROFILE == "fast":
+                browser_profile.apply_request_blocking(driver, EXTRA_BLOCKED_URL_PATTERNS)
+            else:
+                logger.info("Maximizing window")
+                driver.maximize_window()
             
-            print("WebDriver initialized successfully")
             logger.info("WebDriver initialized successfully")
+            return driver
         except Exception as e:
-            print(f"Error setting up WebDriver: {str(e)}")
             logger.error(f"Error setting up WebDriver: {str(e)}")
             raise
     
+    def _attach_driver(self, driver):
+        """Make a driver the active one."""
+        self.driver = self.tracer.instrument(driver)
+        self.waiter = DomWaiter(self.driver)
+        # A new Chrome starts with an empty cache
+        self.last_warm_up = None
+        if NETWORK_INVENTORY:
+            self.inventory = NetworkInventoryWatcher(self.driver, self.event.ticket_type)
+            self.inventory.enable()
+            logger.info("Reading availability from inventory API responses")
+    
+    def _prepare_standby(self, driver, session):
+        """Log a standby driver in with the active driver's session and load the event page once."""
+        if not session:
+            raise ValueError("No logged-in session to copy into the new driver")
+        inject_session(driver, f"{BASE_URL}/robots.txt", session)
+        driver.get(self.event.url)
+    
+    def _standby_logged_in(self, driver):
+        """Check with one cheap request that the standby driver's cookies are still logged in."""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return is_logged_in(self.http, LOGIN_URL, driver.get_cookies(), user_agent)
+    
+    def _warm_up_network(self):
+        """Resolve DNS, open the keep-alive connection and measure the clock offset while Chrome starts."""
+        try:
+            warm_up_connection(self.startup, self.http, self.event.url)
+            if self.event.sale_date and not self.clock.samples:
+                with self.startup.stage("clock"):
+                    self.clock.measure(self.http, self.event.url)
+        except Exception as e:
+            logger.warning(f"Network warm-up failed: {str(e)}")
+    
+    def _preload_session(self):
+        """
+        Decrypt the cached session (or the checkpoint's when resuming) and check it is still
+        logged in before the browser is up.
+        """
+        cache = self._session_cache()
+        try:
+            if self.resume and self.checkpoints:
+                self.resume_checkpoint = self.checkpoints.load(self.event.url)
+                if self.resume_checkpoint:
+                    state = self.resume_checkpoint["session"]
+                    if is_logged_in(self.http, LOGIN_URL, state["cookies"]):
+                        self.preloaded_session = (state, True)
+                        return
+                    # The cart belonged to that session
+                    logger.info("Checkpointed session has expired - starting over")
+                    self.resume_checkpoint = None
+            if cache is None:
+                return
+            state = cache.load()
+            valid = bool(state) and is_logged_in(self.http, LOGIN_URL, state["cookies"])
+            self.preloaded_session = (state, valid)
+        except Exception as e:
+            logger.warning(f"Error preloading cached session: {str(e)}")
+    
     def check_ticket_availability(self):
         """Check if tickets are available for purchase."""
         try:
-            self.driver.get(EVENT_URL)
+            self.driver.get(self.event.url)
             current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             logger.info(f"Checking ticket availability at {current_time}")
-            logger.info(f"Current URL: {self.driver.current_url}")
             
-            # Look for indicators that tickets are available
-            try:
-                # Check if there's a "Buy tickets" button or similar
-                buy_button = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Buy') or contains(text(), 'Purchase') or contains(text(), 'Get tickets')]"))
-                )
-                logger.info(f"Found buy button with text: '{buy_button.text}'")
+            # One snapshot instead of separate lookups and a full page_source copy
+            self.page_state = read_page_state(self.driver, self.selectors, self.event.ticket_type)
+            logger.info(f"Current URL: {self.page_state.url}")
+            
+            # Same rules as the offline classifier used by the HTTP probe
+            classification = classify_page_state(self.page_state)
+            if classification.status == availability.ON_SALE:
+                logger.info(f"Found {classification.reason}")
                 logger.info("Tickets appear to be available! Proceeding with purchase...")
                 return True
-            except TimeoutException:
-                # Check if the page contains text indicating tickets are not yet available
-                page_source = self.driver.page_source
-                if "Ticket sale online starts on 13.04.2025 19:00" in page_source:
-                    logger.info("Found message: 'Ticket sale online starts on 13.04.2025 19:00'")
-                    logger.info("Tickets are not yet available. Will check again.")
-                    return False
-                else:
-                    # If the expected text is not found, the page might have changed
-                    logger.info("Expected message about ticket sale date not found.")
-                    logger.info("Page structure has changed. This might indicate tickets are available.")
-                    return True
+            elif classification.status == availability.PRE_SALE:
+                logger.info(f"Found message: '{self.page_state.sale_status}'")
+                logger.info("Tickets are not yet available. Will check again.")
+                return False
+            elif classification.status == availability.ERROR:
+                logger.warning(f"Event page shows an error ({classification.reason}). Will check again.")
+                return False
+            else:
+                # If the expected text is not found, the page might have changed
+                logger.info("Expected message about ticket sale date not found.")
+                logger.info("Page structure has changed. This might indicate tickets are available.")
+                return True
                     
         except Exception as e:
             logger.error(f"Error checking ticket availability: {str(e)}")
             return False
     
+    def _sale_still_closed(self):
+        """
+        Ask the HTTP probe whether the pre-sale marker is still on the event page. Also True
+        while the server is overloaded, as loading the page in the browser would only add to it.
+        """
+        if PROBE_MODE != "http" or self.probe is None:
+            return False
+        
+        result = self.probe.check()
+        self.clock.add_sample(result.server_date, result.sent_at, result.received_at)
+        overload = self.polling.record("http", result.status, result.elapsed, result.error, result.retry_after)
+        self.recorder.record("http_check", self.event.url, result.elapsed, result.page_status or result.error,
+                             html=result.html, http_status=result.status)
+        if self.polling.overloaded:
+            logger.warning(f"Server overloaded ({overload}) - backing off")
+            self.metrics.record_error("probe")
+            return True
+        if overload:
+            logger.warning(f"Server slowing down ({overload}) - backing off")
+        if result.available is None:
+            logger.warning(f"HTTP probe failed ({result.error}), falling back to a browser check")
+            self.metrics.record_error("probe")
+            return False
+        
+        cached = " (not modified)" if result.not_modified else ""
+        logger.info(f"HTTP probe answered in {result.elapsed * 1000:.0f} ms{cached}: {result.page_status}")
+        if result.available:
+            logger.info("Pre-sale marker is gone - handing over to the browser")
+        return not result.available
+    
+    @traced("purchase_tickets")
     def purchase_tickets(self):
         """Attempt to purchase tickets once they're available."""
         try:
-            # Click on the buy tickets button
-            buy_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Buy') or contains(text(), 'Purchase') or contains(text(), 'Get tickets')]"))
-            )
-            buy_button.click()
-            logger.info("Clicked on buy tickets button")
+            self._click_buy_button()
             
-            # Try purchasing with current quantity
-            return self._try_purchase_with_current_quantity()
+            # Run the purchase state machine with the current quantity
+            return self._run_purchase_flow()
             
         except Exception as e:
             logger.error(f"Error during purchase process: {str(e)}")
+            self.recorder.capture(self.driver, "error-purchase", error=str(e))
             return False
     
-    def _try_purchase_with_current_quantity(self):
-        """Try to purchase tickets with the current quantity setting."""
+    def _click_buy_button(self):
+        """Click on the buy tickets button, which opens the ticket selection."""
+        buy_button = self._timed_wait("purchase_tickets", "buy_button", "clickable", 10)
+        buy_button.click()
+        logger.info("Clicked on buy tickets button")
+    
+    def _build_purchase_flow(self):
+        """Purchase steps from the flow file, keyed by the state they start from."""
+        self.step_actions = {
+            "click": self._click_target,
+            "select_ticket": self._select_ticket_type,
+            "complete_purchase": self._complete_purchase,
+        }
+        self.error_handlers = {"reduce_quantity": self._reduce_quantity}
+        steps = {}
+        for step in self.flow.steps:
+            if step.action not in self.step_actions:
+                raise ValueError(f"Step {step.name} uses unknown action {step.action}")
+            if step.on_error and step.on_error not in self.error_handlers:
+                raise ValueError(f"Step {step.name} uses unknown error handler {step.on_error}")
+            steps[step.from_state] = (step.name, functools.partial(self._run_step, step))
+        return PurchaseFlow(
+            steps,
+            max_step_retries=MAX_STEP_RETRIES,
+            on_transition=self._on_purchase_transition,
+            on_step_error=self._on_step_error,
+        )
+    
+    def _on_purchase_transition(self, old_state, new_state):
+        self.purchase_state = new_state
+        self.recorder.record("transition", status=new_state, previous=old_state)
+        if new_state == purchase_flow.FAILED:
+            # The flow gave up - only now is the page worth a DOM snapshot for the post-mortem
+            self.recorder.capture(self.driver, f"failed-{old_state}", state=old_state)
+            self.recorder.dump(f"error-{self.failed_step or old_state}")
+        self._save_checkpoint()
+    
+    def _on_step_error(self, name, error):
+        """Note the failed step without touching the driver - the step is retried in place right after."""
+        self.metrics.record_error(name)
+        self.failed_step = name
+        self.recorder.record(f"error-{name}", status="step_failed", state=self.purchase_state, error=str(error))
+    
+    def _instance_dir(self, path):
+        return os.path.join(path, self.instance) if self.instance else path
+    
+    def _instance_file(self, path):
+        """
+        `path` with the instance name before the extension. Every buyer keeps its own state
+        files - each loads its file once and writes its whole state back, so a shared file
+        would only keep the last writer's.
+        """
+        if not path or not self.instance:
+            return path
+        root, extension = os.path.splitext(path)
+        return f"{root}-{self.instance}{extension}"
+    
+    def _checkpoint_store(self):
+        if not CHECKPOINT_FILE or not LOGIN_PASSWORD:
+            return None
+        return CheckpointStore(self._instance_file(CHECKPOINT_FILE), f"{LOGIN_EMAIL}:{LOGIN_PASSWORD}", max_age=CHECKPOINT_MAX_AGE)
+    
+    def _save_checkpoint(self, refresh_session=False):
+        """
+        Snapshot the run so a restart can resume here. The session (three WebDriver calls) is
+        only captured after login; a purchase transition costs a current_url call, plus one
+        get_cookies call once the tickets are in the cart. Encrypting and writing happen in the background.
+        """
+        if self.checkpoints is None or self.driver is None:
+            return
         try:
-            # Select ticket type
-            self._select_ticket_type()
-            
-            # Add tickets to cart
-            self._add_to_cart()
-            
-            # Check if there was an error (like quantity limit exceeded)
-            try:
-                error_message = WebDriverWait(self.driver, 3).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'error') or contains(@class, 'alert')]"))
-                )
-                error_text = error_message.text
-                logger.warning(f"Error message found: {error_text}")
-                
-                # If there's an error and we still have room to decrease quantity
-                if self.current_ticket_quantity > 1:
-                    self.current_ticket_quantity -= 1
-                    logger.info(f"Reducing ticket quantity to {self.current_ticket_quantity} and retrying")
-                    self.driver.get(EVENT_URL)  # Refresh and start over
-                    return self.purchase_tickets()
-                else:
-                    logger.error("Failed to purchase even with minimum quantity")
-                    return False
-            except TimeoutException:
-                # No error found, continue with checkout
-                pass
-            
-            # Proceed to checkout
-            self._proceed_to_checkout()
-            
-            # Fill in user information
-            self._fill_user_info()
-            
-            # Complete purchase
-            self._complete_purchase()
-            
-            logger.info(f"Purchase process completed successfully with {self.current_ticket_quantity} tickets!")
+            if refresh_session or self.checkpoint_session is None:
+                self.checkpoint_session = capture_session(self.driver)
+                url = self.checkpoint_session["url"]
+            else:
+                url = self.driver.current_url
+                if self.purchase_state == purchase_flow.IN_CART:
+                    # Adding to the cart may have set a cart cookie
+                    cookies = self.driver.get_cookies()
+                    if _cookie_values(cookies) != _cookie_values(self.checkpoint_session["cookies"]):
+                        self.checkpoint_session = dict(self.checkpoint_session, cookies=cookies, saved_at=time.time())
+            self.checkpoints.save({
+                "event_url": self.event.url,
+                "purchase_state": self.purchase_state,
+                "current_ticket_quantity": self.current_ticket_quantity,
+                "retries": self.retries,
+                "check_count": self.check_count,
+                "url": url,
+                "session": self.checkpoint_session,
+            })
+        except Exception as e:
+            logger.warning(f"Error saving checkpoint: {str(e)}")
+    
+    def _apply_checkpoint(self, checkpoint):
+        """Take over the counters and ticket quantity of a checkpointed run."""
+        self.current_ticket_quantity = checkpoint["current_ticket_quantity"]
+        self.retries = checkpoint["retries"]
+        self.check_count = checkpoint["check_count"]
+        age = time.time() - checkpoint["saved_at"]
+        logger.info(f"Resuming from a checkpoint saved {age:.0f} s ago: state {checkpoint['purchase_state']}, "
+                    f"quantity {self.current_ticket_quantity}, {self.check_count} checks, {self.retries} retries")
+    
+    def _resume_purchase(self, checkpoint):
+        """
+        Continue a purchase that had tickets in the cart when the checkpoint was written, on
+        the page it was on. Returns True if it completed; on failure the normal loop takes over.
+        """
+        state = checkpoint["purchase_state"]
+        if state not in purchase_flow.RESUMABLE_STATES:
+            return False
+        logger.info(f"Reopening {checkpoint['url']} to continue the purchase from {state}")
+        self.driver.get(checkpoint["url"])
+        self.purchase_flow.reset(state)
+        logger.info(f"Back in the purchase flow {self.startup.since_start():.1f} s after start")
+        if self._run_purchase_flow(restart_from_event_page=False):
             return True
+        logger.warning("Resumed purchase did not complete - watching the event page again")
+        self.purchase_flow.reset()
+        return False
+    
+    def _run_purchase_flow(self, restart_from_event_page=True):
+        """Run the purchase state machine, reloading the event page only as a last resort."""
+        restarts = MAX_FLOW_RESTARTS if restart_from_event_page else 0
+        for restart in range(restarts + 1):
+            if restart:
+                logger.info(f"Restarting purchase from the event page ({restart}/{MAX_FLOW_RESTARTS})")
+                self.driver.get(self.event.url)
+                self._click_buy_button()
+                self.purchase_flow.reset()
+            elif self.purchase_flow.state in (purchase_flow.DONE, purchase_flow.FAILED):
+                self.purchase_flow.reset()
             
-        except Exception as e:
-            logger.error(f"Error during purchase attempt with quantity {self.current_ticket_quantity}: {str(e)}")
+            completed = self.purchase_flow.run()
+            self.step_timings.save()
+            if completed:
+                logger.info(f"Purchase process completed successfully with {self.current_ticket_quantity} tickets!")
+                return True
+        
+        logger.error(f"Purchase failed with quantity {self.current_ticket_quantity}")
+        return False
+    
+    def _run_step(self, step):
+        """Run one step of the flow file and return the state it leads to."""
+        with self.tracer.span(step.name):
+            for group in step.require:
+                self._timed_wait(step.name, group, "present", step.timeout)
+            element = None
+            if step.target:
+                element = self._timed_wait(step.name, step.target, step.condition, step.timeout)
+            self.step_actions[step.action](step, element)
             
-            # If we still have room to decrease quantity, try again
-            if self.current_ticket_quantity > 1:
-                self.current_ticket_quantity -= 1
-                logger.info(f"Reducing ticket quantity to {self.current_ticket_quantity} and retrying")
-                self.driver.get(EVENT_URL)  # Refresh and start over
-                return self.purchase_tickets()
-            else:
-                logger.error("Failed to purchase even with minimum quantity")
-                return False
+            if not (step.success or step.error):
+                return step.to_state
+            outcome, element = self._wait_for_outcome(step)
+            if outcome == "success":
+                return step.to_state
+            
+            error_text = element.text if element is not None else ""
+            logger.warning(f"Error message found: {error_text}")
+            if not step.on_error:
+                raise RuntimeError(f"Step {step.name} failed: {error_text}")
+            return self.error_handlers[step.on_error](step, error_text)
     
-    def _select_ticket_type(self):
-        """Select the desired ticket type."""
+    def _timed_wait(self, step_name, group, condition, limit):
+        """Wait for a locator group with a timeout learned from past runs, and record how long it took."""
+        timeout = self.step_timings.timeout(step_name, group, limit)
+        start = time.perf_counter()
         try:
-            # Wait for ticket options to be visible
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, f"//div[contains(text(), '{TICKET_TYPE}')]"))
-            )
-            
-            # Find the ticket type and click on it
-            ticket_element = self.driver.find_element(By.XPATH, f"//div[contains(text(), '{TICKET_TYPE}')]")
-            ticket_element.click()
-            logger.info(f"Selected ticket type: {TICKET_TYPE}")
+            element = self.selectors.wait(self.waiter, group, timeout=timeout, condition=condition,
+                                          ticket_type=self.event.ticket_type)
+        except TimeoutException:
+            self.step_timings.timed_out(step_name, group)
+            raise
+        self.step_timings.record(step_name, group, time.perf_counter() - start)
+        return element
+    
+    def _wait_for_outcome(self, step):
+        """
+        Wait for whichever shows up first after the action: a success or an error group.
+        Returns ("success" | "error", element). A step with error groups only counts as a
+        success once its error window passed without an error.
+        """
+        xpaths, owners = [], []
+        for group in step.success + step.error:
+            group_xpaths = self.selectors.xpaths(group, ticket_type=self.event.ticket_type)
+            xpaths.extend(group_xpaths)
+            owners.extend([group] * len(group_xpaths))
+        
+        phase = "outcome" if step.success else "error_window"
+        timeout = self.step_timings.timeout(step.name, phase, step.timeout if step.success else step.error_window)
+        start = time.perf_counter()
+        try:
+            index, element = self.waiter.first(xpaths, timeout, "visible")
+        except TimeoutException:
+            if not step.success:
+                return "success", None
+            self.step_timings.timed_out(step.name, phase)
+            raise
+        self.step_timings.record(step.name, phase, time.perf_counter() - start)
+        return ("error" if owners[index] in step.error else "success"), element
+    
+    def _click_target(self, step, element):
+        element.click()
+        logger.info(f"Clicked {step.target} ({step.name})")
+    
+    def _reduce_quantity(self, step, error_text):
+        """Error handler for a quantity limit: select again with fewer tickets."""
+        if self.current_ticket_quantity <= 1:
+            raise RuntimeError(f"Failed to add even the minimum quantity to the cart: {error_text}")
+        
+        # Take the permitted maximum from the message if it names one, otherwise step down by one
+        limit = permitted_quantity_from_text(error_text)
+        if limit is not None and limit < self.current_ticket_quantity:
+            self.current_ticket_quantity = max(limit, 1)
+        else:
+            self.current_ticket_quantity -= 1
+        logger.info(f"Reducing ticket quantity to {self.current_ticket_quantity} and selecting again")
+        return purchase_flow.START
+    
+    def _select_ticket_type(self, step, ticket_element):
+        """Select the desired ticket type and quantity."""
+        try:
+            if WARM_PATH:
+                if self._select_ticket_in_one_call(ticket_element):
+                    return
+                # The row is clicked, but its own quantity input wasn't where the script looked
+                logger.info("No quantity input at the recorded place - searching around the ticket row")
+            else:
+                ticket_element.click()
+                logger.info(f"Selected ticket type: {self.event.ticket_type}")
             
             # Set quantity if needed
             if self.current_ticket_quantity > 1:
-                # This will need to be adjusted based on the actual page structure
-                quantity_input = self.driver.find_element(By.XPATH, "//input[@type='number']")
+                # Only the row's own input - another ticket type's may come first on the page
+                quantity_input = find_quantity_input(ticket_element, self.selectors)
+                if quantity_input is None:
+                    raise RuntimeError(f"No quantity input found for ticket type: {self.event.ticket_type}")
+                
+                # Pick the permitted quantity in one go instead of stepping down after errors
+                max_attribute = quantity_input.get_attribute("max")
+                permitted = int(max_attribute) if max_attribute and max_attribute.isdigit() else None
+                if permitted is not None and 0 < permitted < self.current_ticket_quantity:
+                    logger.info(f"Page allows at most {permitted} tickets")
+                    self.current_ticket_quantity = permitted
                 quantity_input.clear()
                 quantity_input.send_keys(str(self.current_ticket_quantity))
                 logger.info(f"Set ticket quantity to {self.current_ticket_quantity}")
@@ -218,76 +596,72 @@ class EventfrogTicketBuyer:
             logger.error(f"Error selecting ticket type: {str(e)}")
             raise
     
-    def _add_to_cart(self):
-        """Add selected tickets to cart."""
-        try:
-            add_to_cart_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Add to cart') or contains(text(), 'Continue')]"))
-            )
-            add_to_cart_button.click()
-            logger.info("Added tickets to cart")
-            
-        except Exception as e:
-            logger.error(f"Error adding tickets to cart: {str(e)}")
-            raise
+    def _select_ticket_in_one_call(self, ticket_element):
+        """
+        Click the ticket row and set the quantity of its own input in a single script call.
+        Returns False if the row was clicked but no quantity input was found inside it.
+        """
+        selected = select_ticket(self.driver, ticket_element, self.current_ticket_quantity, self.selectors, self.ticket_plan)
+        logger.info(f"Selected ticket type: {self.event.ticket_type}")
+        if self.current_ticket_quantity <= 1:
+            return True
+        if not selected["quantity_found"]:
+            return False
+        if selected["quantity"] < self.current_ticket_quantity:
+            logger.info(f"Page allows at most {selected['quantity_max']} tickets")
+            self.current_ticket_quantity = selected["quantity"]
+        logger.info(f"Set ticket quantity to {self.current_ticket_quantity}")
+        return True
     
-    def _proceed_to_checkout(self):
-        """Proceed to checkout page."""
-        try:
-            checkout_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Checkout') or contains(text(), 'Proceed to payment')]"))
-            )
-            checkout_button.click()
-            logger.info("Proceeded to checkout")
-            
-        except Exception as e:
-            logger.error(f"Error proceeding to checkout: {str(e)}")
-            raise
+    def _warm_up_due(self):
+        """Warm up once per WARM_UP_INTERVAL, and only if it can finish before the fast-polling window opens."""
+        if not WARM_PATH:
+            return False
+        if self.scheduler is not None and self.scheduler.until_window() < WARM_UP_BUDGET:
+            return False
+        return self.last_warm_up is None or time.monotonic() - self.last_warm_up >= WARM_UP_INTERVAL
     
-    def _fill_user_info(self):
-        """Fill in user information on checkout page."""
+    def _warm_up(self):
+        """Record the ticket row's structure and pre-load the checkout route's assets while the sale is closed."""
+        self.last_warm_up = time.monotonic()
+        start = time.perf_counter()
         try:
-            logger.info("Filling in user information")
-            
-            # Wait for the form to be visible
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "email"))
-            )
-            
-            # The user information should already be filled in after login
-            # Just verify that the form is present and proceed
-            
-            logger.info("User information should be pre-filled from account")
+            if self.driver.current_url != self.event.url:
+                self.driver.get(self.event.url)
             
-            # Click continue button
-            continue_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continue') or contains(text(), 'Next')]"))
-            )
-            continue_button.click()
-            logger.info("Clicked continue button")
-            
-            return True
+            row = self.selectors.find(self.waiter, "ticket_row", ticket_type=self.event.ticket_type)
+            if row is not None:
+                self.ticket_plan = record_ticket_row(self.driver, row, self.selectors)
+                self.selectors.pin("ticket_row", self.ticket_plan.row_xpath)
+                self.selectors.pin("quantity_input", self.ticket_plan.quantity_xpath)
+                logger.info(f"Recorded ticket row: row {self.ticket_plan.row_xpath or 'without stable id'}, "
+                            f"quantity input {self.ticket_plan.quantity_xpath or 'without stable id'}")
+            elif self.ticket_plan is None:
+                logger.info("Ticket row not shown before the sale - it will be located on the live page")
             
+            remaining = WARM_UP_BUDGET - (time.perf_counter() - start)
+            if remaining <= 0:
+                logger.warning(f"Warm-up used up its {WARM_UP_BUDGET} s budget before pre-loading checkout assets")
+                return
+            cached = precache_assets(self.driver, [urljoin(BASE_URL, path) for path in WARM_UP_PATHS], remaining)
+            if cached.get("error"):
+                logger.warning(f"Pre-loading checkout assets stopped early: {cached['error']}")
+            logger.info(f"Warm-up took {(time.perf_counter() - start) * 1000:.0f} ms: "
+                        f"{cached['cached']}/{cached['assets']} assets of {cached['pages']} checkout pages in the browser cache")
         except Exception as e:
-            logger.error(f"Error filling in user information: {str(e)}")
-            return False
+            logger.warning(f"Warm-up failed: {str(e)}")
     
-    def _complete_purchase(self):
+    def _complete_purchase(self, step, complete_button):
         """Complete the purchase process."""
         try:
             # Accept terms and conditions if present
-            try:
-                terms_checkbox = self.driver.find_element(By.XPATH, "//input[@type='checkbox']")
+            terms_checkbox = self.selectors.find(self.waiter, "terms_checkbox")
+            if terms_checkbox:
                 terms_checkbox.click()
                 logger.info("Accepted terms and conditions")
-            except NoSuchElementException:
+            else:
                 logger.info("No terms and conditions checkbox found")
             
-            # Click on complete purchase button
-            complete_button = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Complete purchase') or contains(text(), 'Pay now')]"))
-            )
-            
             # Uncomment the line below to actually complete the purchase
             # complete_button.click()
             logger.info("Purchase button found but not clicked (safety measure)")
@@ -300,8 +674,73 @@ class EventfrogTicketBuyer:
             logger.error(f"Error completing purchase: {str(e)}")
             raise
     
+    def _session_cache(self):
+        if not SESSION_CACHE_FILE or not LOGIN_PASSWORD:
+            return None
+        return SessionCache(SESSION_CACHE_FILE, f"{LOGIN_EMAIL}:{LOGIN_PASSWORD}")
+    
+    def _restore_session(self):
+        """Restore a cached login session and check it with one cheap request."""
+        cache = self._session_cache()
+        if cache is None and self.preloaded_session is None:
+            return False
+        
+        try:
+            if self.preloaded_session is not None:
+                # Already decrypted and checked during startup
+                state, valid = self.preloaded_session
+                self.preloaded_session = None
+                if not state:
+                    logger.info("No cached session found")
+                    return False
+                if not valid:
+                    logger.info("Cached session has expired - logging in again")
+                    cache.clear()
+                    return False
+                restored = inject_session(self.driver, f"{BASE_URL}/robots.txt", state)
+                logger.info(f"Restored {restored} cookies, the session is still logged in - skipping login")
+                return True
+            
+            state = cache.restore(self.driver, f"{BASE_URL}/robots.txt")
+            if not state:
+                logger.info("No cached session found")
+                return False
+            
+            user_agent = self.driver.execute_script("return navigator.userAgent;")
+            if is_logged_in(self.http, LOGIN_URL, self.driver.get_cookies(), user_agent):
+                logger.info("Cached session is still logged in - skipping login")
+                return True
+            
+            logger.info("Cached session has expired - logging in again")
+            self.driver.delete_all_cookies()
+            cache.clear()
+        except Exception as e:
+            logger.warning(f"Error restoring cached session: {str(e)}")
+        return False
+    
+    def _save_session(self):
+        cache = self._session_cache()
+        if cache is None:
+            return
+        try:
+            cache.save(self.driver)
+        except Exception as e:
+            logger.warning(f"Error saving session cache: {str(e)}")
+    
+    @traced("login")
     def login(self):
-        """Login to Eventfrog."""
+        """Login to Eventfrog, reusing the cached session when it is still valid."""
+        if self._restore_session():
+            return True
+        
+        if not self._login_with_form():
+            return False
+        
+        self._save_session()
+        return True
+    
+    def _login_with_form(self):
+        """Login to Eventfrog through the login form."""
         MAX_LOGIN_ATTEMPTS = 3
         attempt = 0
         
@@ -313,36 +752,27 @@ class EventfrogTicketBuyer:
                 logger.info(f"Attempting to login with email: {LOGIN_EMAIL}")
                 
                 # Navigate to login page
-                self.driver.get("https://eventfrog.ch/en/login.html")
+                self.driver.get(LOGIN_URL)
                 logger.info(f"Navigated to login page: {self.driver.current_url}")
                 
-                # Wait for page to load
-                time.sleep(3)
+                # Wait for the login form instead of a fixed delay
+                self.selectors.wait(self.waiter, "login_form", timeout=10)
                 
                 # Handle cookies consent modal if it appears
                 try:
-                    # Try different selectors for the accept cookies button
-                    cookie_button_selectors = [
-                        "//button[contains(text(), 'Accept') or contains(text(), 'Agree') or contains(text(), 'OK')]",
-                        "//a[contains(text(), 'Accept') or contains(text(), 'Agree') or contains(text(), 'OK')]",
-                        "//button[contains(@class, 'accept') or contains(@class, 'agree')]",
-                        "//button[@id='accept-cookies']",
-                        "//button[@id='acceptCookies']"
-                    ]
-                    
-                    for selector in cookie_button_selectors:
+                    # Look for a visible accept cookies button, trying the selector that worked last time first
+                    try:
+                        selector, button = self.selectors.locate(self.waiter, "cookie_consent", timeout=0, condition="visible")
+                        logger.info(f"Found cookie consent button with text: '{button.text}'")
+                        button.click()
+                        logger.info("Clicked cookie consent button")
+                        # Wait for the modal to disappear
                         try:
-                            cookie_buttons = self.driver.find_elements(By.XPATH, selector)
-                            if cookie_buttons:
-                                for button in cookie_buttons:
-                                    if button.is_displayed():
-                                        logger.info(f"Found cookie consent button with text: '{button.text}'")
-                                        button.click()
-                                        logger.info("Clicked cookie consent button")
-                                        time.sleep(1)  # Wait for modal to disappear
-                                        break
-                        except:
-                            continue
+                            self.waiter.gone(selector, timeout=1)
+                        except TimeoutException:
+                            pass
+                    except TimeoutException:
+                        pass
                     
                     # Also try with JavaScript as a fallback
                     cookie_js = """
@@ -353,6 +783,7 @@ class EventfrogTicketBuyer:
                             var text = button.textContent.toLowerCase();
                             if (text.includes('accept') || text.includes('agree') || text.includes('ok') || 
                                 text.includes('cookie') || text.includes('consent')) {
+                                button.setAttribute('data-buyer-clicked', 'true');
                                 button.click();
                                 return true;
                             }
@@ -363,7 +794,11 @@ class EventfrogTicketBuyer:
                     cookie_clicked = self.driver.execute_script(cookie_js)
                     if cookie_clicked:
                         logger.info("Clicked cookie consent button using JavaScript")
-                        time.sleep(1)  # Wait for modal to disappear
+                        # Wait for the modal to disappear
+                        try:
+                            self.waiter.gone("//*[@data-buyer-clicked]", timeout=1)
+                        except TimeoutException:
+                            pass
                 
                 except Exception as e:
                     logger.warning(f"Error handling cookie consent: {str(e)}")
@@ -379,11 +814,15 @@ class EventfrogTicketBuyer:
                     document.getElementById('submit').click();
                 """
                 
+                login_page_url = self.driver.current_url
                 self.driver.execute_script(login_script)
                 logger.info("Executed JavaScript to fill in login form and click submit button")
                 
-                # Wait for login to complete
-                time.sleep(5)
+                # Wait for the form submission to load the next page
+                try:
+                    self.waiter.navigation(login_page_url, timeout=10)
+                except TimeoutException:
+                    logger.warning("Login form submission did not navigate within 10 seconds")
                 
                 # Check if login was successful
                 if "login" not in self.driver.current_url.lower():
@@ -392,21 +831,12 @@ class EventfrogTicketBuyer:
                     # Additional verification - check for elements that indicate logged-in state
                     try:
                         # Look for common elements that appear when logged in
-                        logged_in_indicators = [
-                            "//a[contains(@href, 'logout')]",
-                            "//div[contains(@class, 'user-menu')]",
-                            "//span[contains(text(), 'My Account')]",
-                            "//a[contains(@href, 'account')]",
-                            "//a[contains(text(), 'My Profile')]"
-                        ]
-                        
-                        for indicator in logged_in_indicators:
-                            try:
-                                element = self.driver.find_element(By.XPATH, indicator)
-                                logger.info(f"Confirmed logged in state - found element: {indicator}")
-                                return True
-                            except:
-                                continue
+                        try:
+                            indicator, element = self.selectors.locate(self.waiter, "logged_in", timeout=0)
+                            logger.info(f"Confirmed logged in state - found element: {indicator}")
+                            return True
+                        except TimeoutException:
+                            pass
                         
                         # If we didn't find any indicators but we're not on the login page,
                         # we'll assume login was successful
@@ -422,7 +852,7 @@ class EventfrogTicketBuyer:
                     
                     # Try to identify error messages
                     try:
-                        error_elements = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'error') or contains(@class, 'alert')]")
+                        error_elements = self.driver.find_elements(By.XPATH, self.selectors.xpaths("error_banner")[0])
                         if error_elements:
                             for error in error_elements:
                                 logger.error(f"Login error message: {error.text}")
@@ -451,86 +881,192 @@ class EventfrogTicketBuyer:
         """Main execution method to monitor and purchase tickets."""
         try:
             logger.info("Starting Eventfrog Ticket Buyer")
-            logger.info(f"Monitoring event: {EVENT_URL}")
+            logger.info(f"Monitoring event: {self.event.url}")
             logger.info(f"Refresh interval: {REFRESH_INTERVAL} seconds")
-            logger.info(f"Will try with max {MAX_TICKET_QUANTITY} tickets, reducing if needed")
-            logger.info(f"Target ticket type: {TICKET_TYPE}")
+            logger.info(f"Will try with max {self.event.max_quantity} tickets, reducing if needed")
+            logger.info(f"Target ticket type: {self.event.ticket_type}")
             logger.info(f"Current time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"Expected ticket sale time: {SALE_DATE}")
+            logger.info(f"Expected ticket sale time: {self.event.sale_date}")
+            self._start_metrics_server()
             
             # Login is required - must succeed before continuing
             logger.info("Logging in to Eventfrog is required before monitoring tickets")
             if not self.login():
                 logger.error("Failed to log in to Eventfrog. Cannot continue without login.")
                 logger.error("Please check your credentials and try again.")
+                self.metrics.record_error("login")
                 return
             
             logger.info("Successfully logged in to Eventfrog. Starting ticket monitoring.")
+            self.supervisor.watch(self.driver)
+            
+            if PROBE_MODE == "http":
+                self.probe = AvailabilityProbe(self.event.url, self.event.ticket_type, pool=self.http)
+                self.probe.sync_from_driver(self.driver)
             
             tickets_purchased = False
-            retries = 0
-            check_count = 0
+            checkpoint = self.resume_checkpoint
+            if checkpoint:
+                self._apply_checkpoint(checkpoint)
+                if checkpoint["purchase_state"] == purchase_flow.DONE:
+                    logger.info("The checkpointed run already completed the purchase - nothing to resume")
+                    return
+                tickets_purchased = self._resume_purchase(checkpoint)
+            self._save_checkpoint(refresh_session=True)
+            first_check = self.check_count + 1
             
-            # Parse the sale date for logging purposes
+            # Parse the sale date to schedule checks around it
             try:
-                sale_datetime = datetime.strptime(SALE_DATE, "%d.%m.%Y %H:%M")
+                sale_datetime = self.event.sale_datetime()
                 logger.info(f"Parsed sale date: {sale_datetime}")
             except Exception as e:
                 logger.error(f"Error parsing sale date: {str(e)}")
                 sale_datetime = None
             
+            if sale_datetime:
+                # Estimate how far our clock is from the server's before relying on it
+                if not self.clock.samples:
+                    self.clock.measure(self.http, self.event.url)
+                self.scheduler = SaleScheduler(
+                    sale_datetime.timestamp(),
+                    self.clock,
+                    fast_interval=REFRESH_INTERVAL,
+                    window_before=SALE_WINDOW_BEFORE,
+                    window_after=SALE_WINDOW_AFTER,
+                    max_interval=MAX_POLL_INTERVAL,
+                )
+            
             while not tickets_purchased:
-                check_count += 1
-                logger.info(f"Check #{check_count} for ticket availability")
+                self.check_count += 1
+                purchase_attempted = False
+                if self.check_count == first_check:
+                    # What counts after a restart close to the sale
+                    self.startup.mark("first_check")
+                    logger.info(f"Time to first check: {self.startup.since_start() * 1000:.0f} ms")
+                
+                check_start = time.perf_counter()
+                check_source = "http"
+                check_observed = False
+                sale_closed = False
+                with self.tracer.span("check", check=self.check_count):
+                    logger.info(f"Check #{self.check_count} for ticket availability")
                 
-                try:
-                    logger.info(f"Checking ticket availability at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Navigate to the event page
-                    self.driver.get(EVENT_URL)
-                    logger.info(f"Current URL: {self.driver.current_url}")
-                    
-                    # Wait for the page to load
-                    WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    
-                    # Check if tickets are available
                     try:
-                        # First, check if there's a message indicating tickets are not yet available
-                        not_available_message = self.driver.find_elements(By.XPATH, "//div[contains(text(), 'Ticket sale online starts on')]")
-                        if not_available_message:
-                            logger.info(f"Found message: '{not_available_message[0].text}'")
-                            logger.info("Tickets are not yet available. Will check again.")
+                        logger.info(f"Checking ticket availability at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    
+                        if self._sale_still_closed():
+                            sale_closed = True
+                            overloaded = self.polling.overloaded
+                            self.metrics.observe_check(time.perf_counter() - check_start, check_source, ok=not overloaded)
+                            check_observed = True
+                            if not overloaded:
+                                logger.info("Tickets are not yet available. Will check again.")
                         else:
-                            # Look for ticket selection elements
-                            ticket_elements = self.driver.find_elements(By.XPATH, f"//div[contains(text(), '{TICKET_TYPE}')]")
+                            check_source = "browser"
+                            # Navigate to the event page and read everything we need in one call
+                            if self.inventory:
+                                self.inventory.clear()
+                            load_start = time.perf_counter()
+                            self.driver.get(self.event.url)
+                            load_time = time.perf_counter() - load_start
+                            self.supervisor.record_load(load_time)
+                            
+                            # The inventory response usually arrives before the ticket rows are rendered
+                            inventory = self.inventory.wait(INVENTORY_WAIT) if self.inventory else None
+                            inventory_open = inventory is not None and inventory.status == availability.ON_SALE
                             
-                            if ticket_elements:
-                                logger.info(f"Found ticket type: {TICKET_TYPE}")
+                            self.page_state = read_page_state(self.driver, self.selectors, self.event.ticket_type)
+                            page_class = classify_page_state(self.page_state)
+                            # The browser doesn't see the status code - a loaded page counts as 200, error pages tell the rest
+                            page_error = page_class.reason if page_class.status == availability.ERROR else None
+                            overload = self.polling.record("browser", 200, load_time, page_error)
+                            self.recorder.record("browser_check", self.page_state.url, load_time, page_class.status,
+                                                 reason=page_class.reason, errors=self.page_state.errors)
+                            if overload:
+                                logger.warning(f"Server struggling ({overload}) - backing off")
+                            self.metrics.observe_check(time.perf_counter() - check_start, check_source, ok=True)
+                            check_observed = True
+                            logger.info(f"Current URL: {self.page_state.url}")
+                    
+                            # Check if tickets are available
+                            try:
+                                if self.page_state.errors:
+                                    logger.warning(f"Error message on event page: {' | '.join(self.page_state.errors)}")
                                 
-                                # Try to purchase tickets
-                                if self.purchase_tickets():
-                                    tickets_purchased = True
-                                    logger.info("Tickets purchased successfully!")
-                                    break
+                                # First, check if there's a message indicating tickets are not yet available
+                                if inventory is not None and inventory.status in (availability.PRE_SALE, availability.SOLD_OUT):
+                                    logger.info(f"Inventory says {inventory.status} ({inventory.reason}). Will check again.")
+                                    sale_closed = True
+                                elif not inventory_open and page_class.status == availability.PRE_SALE:
+                                    sale_closed = True
+                                    logger.info(f"Found message: '{self.page_state.sale_status}'")
+                                    logger.info("Tickets are not yet available. Will check again.")
                                 else:
-                                    retries += 1
-                                    if retries >= 3:
-                                        logger.error("Maximum retries reached. Could not purchase tickets.")
-                                        break
-                                    logger.warning(f"Failed to purchase tickets. Retry {retries}/3")
-                            else:
-                                logger.info("Ticket type not found. Will check again.")
+                                    # Look for ticket selection elements, or trust the inventory before they are rendered
+                                    if self.page_state.ticket_row or inventory_open:
+                                        logger.info(f"Found ticket type: {self.event.ticket_type}")
+                                
+                                        # Try to purchase tickets
+                                        purchase_attempted = True
+                                        if self.scheduler:
+                                            self.scheduler.record_detection()
+                                        if self.purchase_tickets():
+                                            tickets_purchased = True
+                                            logger.info("Tickets purchased successfully!")
+                                            self.recorder.capture(self.driver, "purchase_done")
+                                            self.recorder.dump("purchase")
+                                        else:
+                                            self.recorder.dump("purchase-failed")
+                                            self.metrics.record_error("purchase")
+                                            self.retries += 1
+                                            self._save_checkpoint()
+                                            if self.retries >= MAX_PURCHASE_RETRIES:
+                                                logger.error("Maximum retries reached. Could not purchase tickets.")
+                                            else:
+                                                logger.warning(f"Failed to purchase tickets. Retry {self.retries}/{MAX_PURCHASE_RETRIES}")
+                                    else:
+                                        logger.info("Ticket type not found. Will check again.")
+                            except Exception as e:
+                                logger.error(f"Error checking ticket availability: {str(e)}")
+                                self.supervisor.record_error(e)
+                                self.metrics.record_error("check")
+                
                     except Exception as e:
-                        logger.error(f"Error checking ticket availability: {str(e)}")
+                        logger.error(f"Error during check #{self.check_count}: {str(e)}")
+                        if isinstance(e, TimeoutException):
+                            # The page did not load in time - count it like a request that got no answer
+                            self.polling.record(check_source, None, time.perf_counter() - check_start, str(e))
+                        self.supervisor.record_error(e)
+                        self.metrics.record_error("check")
+                        if not check_observed:
+                            self.metrics.observe_check(time.perf_counter() - check_start, check_source, ok=False)
+                
+                # Write the timeline of every purchase attempt, including the check that triggered it
+                if purchase_attempted:
+                    self.tracer.export("attempt")
+                if tickets_purchased or self.retries >= MAX_PURCHASE_RETRIES:
+                    break
                 
+                # Use the quiet time before the sale to prepare the browser for the flip
+                if sale_closed and not self.polling.overloaded and self._warm_up_due():
+                    self._warm_up()
+                
+                # Swap to the standby driver between two checks if the active one degraded or died
+                try:
+                    in_sale_window = self.scheduler is not None and self.scheduler.phase() == "window"
+                    replacement = self.supervisor.check(build_standby=not in_sale_window)
+                    if replacement:
+                        self._attach_driver(replacement)
                 except Exception as e:
-                    logger.error(f"Error during check #{check_count}: {str(e)}")
+                    logger.error(f"Error replacing the WebDriver: {str(e)}")
+                    self.metrics.record_error("driver")
                 
-                # Always use the fastest refresh rate since the script will be started close to sale time
-                logger.info(f"Waiting for {REFRESH_INTERVAL} seconds before next check...")
-                time.sleep(REFRESH_INTERVAL)
+                # Poll rarely while the sale is far off and at REFRESH_INTERVAL around the sale time,
+                # slower while the server struggles and not at all while the circuit is open
+                delay = self.scheduler.next_delay() if self.scheduler else REFRESH_INTERVAL
+                delay = self.polling.delay(delay)
+                logger.info(f"Waiting for {delay:.2f} seconds before next check...")
+                time.sleep(delay)
                 
         except KeyboardInterrupt:
             logger.info("Process interrupted by user")
@@ -539,13 +1075,35 @@ class EventfrogTicketBuyer:
         finally:
             self.cleanup()
     
+    def _start_metrics_server(self):
+        if self.metrics_port is None or self.metrics_server is not None:
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, METRICS_HOST, self.metrics_port).start()
+            logger.info(f"Serving metrics at {self.metrics_server.url}")
+        except OSError as e:
+            logger.warning(f"Could not start the metrics endpoint on port {self.metrics_port}: {str(e)}")
+    
     def cleanup(self):
+        self.selectors.save()
+        self.step_timings.save()
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        self.supervisor.shutdown()
+        if self.checkpoints:
+            self.checkpoints.close()
+        self.recorder.close()
         if self.driver:
             self.driver.quit()
             logger.info("WebDriver closed")
 
 def main():
-    ticket_buyer = EventfrogTicketBuyer()
+    parser = argparse.ArgumentParser(description="Buy Eventfrog tickets as soon as the sale opens")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Continue from the last checkpoint ({CHECKPOINT_FILE}) instead of starting over")
+    args = parser.parse_args()
+    ticket_buyer = EventfrogTicketBuyer(resume=args.resume)
     ticket_buyer.run()
 
 if __name__ == "__main__":
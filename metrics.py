@@ -0,0 +1,270 @@
+"""
+Live metrics for the watch loop - counters, gauges and histograms rendered in the
+Prometheus text format and served from a small local HTTP endpoint at /metrics.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import purchase_flow
+from backoff import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+CHECK_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RATE_WINDOW = 60.0  # Seconds over which checks per second are averaged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+    def render(self):
+        return "\n".join(self.header() + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A gauge that is set directly, or read from `func` at scrape time (a number, a {labels: value} dict or None)."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), func=None):
+        super().__init__(name, help_text, labelnames)
+        self.func = func
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+    def samples(self):
+        if self.func is None:
+            return super().samples()
+        value = self.func()
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_number(value)}"]
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in sorted(value.items())]
+
+
+class CallbackCounter(Gauge):
+    """A counter kept elsewhere (e.g. by the tracer) and read at scrape time."""
+    kind = "counter"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=CHECK_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(entry, counts=list(entry["counts"]))) for key, entry in self.values.items())
+        lines = []
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry["counts"]):
+                labels = _labels(self.labelnames, key, {"le": _number(bound)})
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(entry['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+class BuyerMetrics:
+    """The metrics of one EventfrogTicketBuyer, read live from the buyer at scrape time."""
+
+    def __init__(self, buyer):
+        self.buyer = buyer
+        self.registry = MetricsRegistry()
+        self.recent_checks = deque()
+        self.last_success = None
+        self._lock = threading.Lock()
+        register = self.registry.register
+
+        self.checks = register(Counter("eventfrog_checks_total", "Availability checks by source and outcome",
+                                       ("source", "outcome")))
+        self.check_latency = register(Histogram("eventfrog_check_duration_seconds",
+                                                "Duration of one availability check", ("source",)))
+        self.errors = register(Counter("eventfrog_errors_total", "Errors by step", ("step",)))
+        register(Gauge("eventfrog_checks_per_second", f"Checks per second over the last {RATE_WINDOW:.0f} s",
+                       func=self._checks_per_second))
+        register(Gauge("eventfrog_seconds_since_last_successful_check",
+                       "Seconds since the last check that completed without an error",
+                       func=self._since_last_success))
+        register(CallbackCounter("eventfrog_webdriver_calls_total", "WebDriver round-trips",
+                                 func=lambda: buyer.tracer.rpc_count))
+        register(CallbackCounter("eventfrog_webdriver_seconds_total", "Time spent in WebDriver round-trips",
+                                 func=lambda: buyer.tracer.rpc_seconds))
+        register(CallbackCounter("eventfrog_dom_wait_seconds_total", "Time spent waiting for the page in DOM wait scripts",
+                                 func=lambda: buyer.tracer.dom_wait_seconds))
+        register(Gauge("eventfrog_driver_renderer_rss_bytes", "Resident memory of the active Chrome's renderers",
+                       func=self._renderer_rss))
+        register(CallbackCounter("eventfrog_driver_swaps_total", "Swaps to a standby driver",
+                                 func=lambda: buyer.supervisor.swaps))
+        register(Gauge("eventfrog_backoff_level", "Backoff steps of the polling interval (0 at full speed)",
+                       func=lambda: buyer.polling.backoff.level))
+        register(Gauge("eventfrog_circuit_state", "Circuit breaker state of the checks (1 for the active one)",
+                       ("state",), func=self._circuit_state))
+        register(CallbackCounter("eventfrog_circuit_opens_total", "Times the circuit breaker paused the checks",
+                                 func=lambda: buyer.polling.breaker.opens))
+        register(Gauge("eventfrog_purchase_state", "Current purchase state (1 for the active one)", ("state",),
+                       func=self._purchase_state))
+
+    def observe_check(self, seconds, source, ok):
+        now = time.monotonic()
+        self.checks.inc(source=source, outcome="ok" if ok else "error")
+        self.check_latency.observe(seconds, source=source)
+        with self._lock:
+            self.recent_checks.append(now)
+            self._prune(now)
+            if ok:
+                self.last_success = now
+
+    def record_error(self, step):
+        self.errors.inc(step=step)
+
+    def _prune(self, now):
+        while self.recent_checks and self.recent_checks[0] < now - RATE_WINDOW:
+            self.recent_checks.popleft()
+
+    def _checks_per_second(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            count = len(self.recent_checks)
+        return count / RATE_WINDOW
+
+    def _since_last_success(self):
+        with self._lock:
+            last = self.last_success
+        return None if last is None else time.monotonic() - last
+
+    def _renderer_rss(self):
+        health = self.buyer.supervisor.health
+        return health.rss if health else None
+
+    def _circuit_state(self):
+        current = self.buyer.polling.breaker.state
+        states = (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN)
+        return {(state,): int(state == current) for state in states}
+
+    def _purchase_state(self):
+        current = self.buyer.purchase_state
+        return {(state,): int(state == current) for state in purchase_flow.STATES}
+
+    def render(self):
+        return self.registry.render()
+
+
+class MetricsServer:
+    """Serves `/metrics` from a metrics source with a render() method on a background thread."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        self.metrics = metrics
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                payload = server.metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
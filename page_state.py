@@ -0,0 +1,103 @@
+"""
+Single-round-trip page state snapshot - one injected script returns everything the
+availability logic needs instead of several find_elements calls and a page_source copy.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Locator groups evaluated by the snapshot script
+SNAPSHOT_GROUPS = ("sale_not_open", "ticket_row", "buy_button", "error_banner", "quantity_input")
+
+PAGE_STATE_JS = """
+    var groups = arguments[0];
+
+    function visible(el) {
+        return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    }
+
+    function first(xpaths) {
+        for (var i = 0; i < xpaths.length; i++) {
+            var el = document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (el) return [i, el];
+        }
+        return null;
+    }
+
+    var state = {url: location.href, ready_state: document.readyState, matched: {}};
+    var hits = {};
+    for (var name in groups) {
+        var hit = first(groups[name]);
+        if (hit) {
+            state.matched[name] = hit[0];
+            hits[name] = hit[1];
+        }
+    }
+
+    state.sale_status = hits.sale_not_open ? hits.sale_not_open.textContent.trim().slice(0, 200) : null;
+    state.ticket_row = !!hits.ticket_row;
+    state.buy_button = !!hits.buy_button;
+    state.buy_button_enabled = !!hits.buy_button && visible(hits.buy_button) && !hits.buy_button.disabled;
+
+    state.errors = [];
+    if (groups.error_banner) {
+        for (var i = 0; i < groups.error_banner.length; i++) {
+            var result = document.evaluate(groups.error_banner[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < result.snapshotLength && state.errors.length < 5; j++) {
+                var el = result.snapshotItem(j);
+                var text = el.textContent.trim();
+                if (text && visible(el)) state.errors.push(text.slice(0, 200));
+            }
+        }
+    }
+
+    state.quantity_max = null;
+    var quantity = hits.quantity_input;
+    if (quantity) {
+        if (quantity.tagName === 'SELECT') {
+            for (var k = 0; k < quantity.options.length; k++) {
+                var value = parseInt(quantity.options[k].value, 10);
+                if (!isNaN(value) && (state.quantity_max === null || value > state.quantity_max)) state.quantity_max = value;
+            }
+        } else if (quantity.getAttribute('max')) {
+            var max = parseInt(quantity.getAttribute('max'), 10);
+            if (!isNaN(max)) state.quantity_max = max;
+        }
+    }
+    return state;
+"""
+
+
+@dataclass
+class PageState:
+    """Compact record of what the event page currently shows."""
+    url: str
+    ready_state: str
+    sale_status: Optional[str]
+    ticket_row: bool
+    buy_button: bool
+    buy_button_enabled: bool
+    errors: list = field(default_factory=list)
+    quantity_max: Optional[int] = None
+    matched: dict = field(default_factory=dict)
+
+    @property
+    def sale_not_open(self):
+        return self.sale_status is not None
+
+
+def read_page_state(driver, selectors, ticket_type):
+    """Take a snapshot of the current page in a single WebDriver call."""
+    groups = {}
+    for group in SNAPSHOT_GROUPS:
+        params = {"ticket_type": ticket_type} if group == "ticket_row" else {}
+        groups[group] = selectors.xpaths(group, **params)
+
+    raw = driver.execute_script(PAGE_STATE_JS, groups)
+    state = PageState(**raw)
+    for group, index in state.matched.items():
+        selectors.record(group, index)
+    return state
@@ -0,0 +1,131 @@
+"""
+Lightweight HTTP availability probe - fetches only the event HTML over a pooled
+keep-alive connection, reusing the cookies of the logged-in Selenium session.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import urllib3
+
+import availability
+from backoff import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Page classifications that mean "keep waiting"; an unknown page may mean the sale opened
+CLOSED_STATUSES = (availability.PRE_SALE, availability.SOLD_OUT)
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of a single probe request. `available` is None when the probe could not decide."""
+    available: Optional[bool]
+    status: Optional[int] = None
+    elapsed: float = 0.0
+    not_modified: bool = False
+    server_date: Optional[str] = None
+    sent_at: Optional[float] = None
+    received_at: Optional[float] = None
+    error: Optional[str] = None
+    html: Optional[str] = None
+    page_status: Optional[str] = None
+    retry_after: Optional[float] = None
+
+
+def create_pool(timeout=5.0, maxsize=4):
+    """Shared keep-alive connection pool used for probing."""
+    return urllib3.PoolManager(
+        num_pools=4,
+        maxsize=maxsize,
+        block=False,
+        retries=False,
+        timeout=urllib3.Timeout(connect=timeout, read=timeout),
+    )
+
+
+class AvailabilityProbe:
+    """Polls the event page over plain HTTP and classifies it with the offline availability classifier."""
+
+    def __init__(self, url, ticket_type=None, pool=None, keep_html=True):
+        self.url = url
+        self.keep_html = keep_html
+        self.ticket_type = ticket_type
+        self.http = pool or create_pool()
+        self.cookies = {}
+        self.user_agent = None
+        self.etag = None
+        self.last_modified = None
+        self.last_available = None
+        self.last_page_status = None
+        self.last_html = None
+
+    def sync_from_driver(self, driver):
+        """Copy the session cookies and user agent from the logged-in browser."""
+        self.cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+        self.user_agent = driver.execute_script("return navigator.userAgent;")
+        logger.info(f"HTTP probe using {len(self.cookies)} cookies from the browser session")
+
+    def _request_headers(self):
+        headers = {
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        if self.user_agent:
+            headers["User-Agent"] = self.user_agent
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def _store_cookies(self, response):
+        for header in response.headers.getlist("Set-Cookie"):
+            name, _, rest = header.partition("=")
+            value = rest.split(";", 1)[0]
+            if name.strip():
+                self.cookies[name.strip()] = value
+
+    def check(self):
+        """Fetch the event page once and decide whether the sale is open."""
+        sent_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = self.http.request("GET", self.url, headers=self._request_headers(), redirect=False)
+        except urllib3.exceptions.HTTPError as e:
+            return ProbeResult(None, elapsed=time.perf_counter() - start, sent_at=sent_at, error=str(e))
+
+        elapsed = time.perf_counter() - start
+        timing = {"server_date": response.headers.get("Date"), "sent_at": sent_at, "received_at": time.time()}
+        self._store_cookies(response)
+
+        if response.status == 304 and self.last_available is not None:
+            return ProbeResult(self.last_available, response.status, elapsed, not_modified=True,
+                               html=self.last_html, page_status=self.last_page_status, **timing)
+
+        if response.status != 200:
+            # Redirects usually mean the session expired - never mistake a login page for an open sale
+            location = response.headers.get("Location", "")
+            return ProbeResult(None, response.status, elapsed, error=f"HTTP {response.status} {location}".strip(),
+                               retry_after=parse_retry_after(response.headers.get("Retry-After")), **timing)
+
+        html = response.data.decode("utf-8", errors="replace")
+        classification = availability.classify_html(html, self.ticket_type)
+        if classification.status == availability.ERROR:
+            # An error page says nothing about the sale - don't cache it against the ETag
+            return ProbeResult(None, response.status, elapsed, error=classification.reason,
+                               page_status=classification.status, **timing)
+
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.last_available = classification.status not in CLOSED_STATUSES
+        self.last_page_status = classification.status
+        # Watching many events only needs the verdict - don't hold on to every page
+        self.last_html = html if self.keep_html else None
+        return ProbeResult(self.last_available, response.status, elapsed, html=self.last_html,
+                           page_status=classification.status, **timing)
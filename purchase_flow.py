@@ -0,0 +1,85 @@
+"""
+Purchase flow as an explicit state machine - every step moves the flow from one state
+to the next, and a failed step is retried in place instead of reloading the event page.
+"""
+
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+START = "start"            # On the event page, nothing selected yet
+SELECTED = "selected"      # Ticket type and quantity chosen
+IN_CART = "in_cart"        # Tickets are in the cart
+CHECKOUT = "checkout"      # On the checkout page
+USER_INFO = "user_info"    # User information confirmed, final page reached
+DONE = "done"
+FAILED = "failed"
+
+STATES = (START, SELECTED, IN_CART, CHECKOUT, USER_INFO, DONE, FAILED)
+
+# States with tickets in the cart - a restarted run continues from these instead of the event page
+RESUMABLE_STATES = (IN_CART, CHECKOUT, USER_INFO)
+
+_QUANTITY_LIMIT = re.compile(r"(?:max(?:imum)?|at most|höchstens|maximal)\D{0,20}(\d+)", re.IGNORECASE)
+
+
+def permitted_quantity_from_text(text):
+    """Extract the permitted maximum from an error message like 'A maximum of 2 tickets ...'."""
+    match = _QUANTITY_LIMIT.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+class PurchaseFlow:
+    """
+    Runs the purchase steps one state at a time.
+
+    `steps` maps a state to `(step name, callable)`. The callable performs the step and
+    returns the next state; it may also return an earlier state (e.g. back to START after
+    a quantity error). An exception retries the same step in place, up to `max_step_retries`
+    times, before the flow gives up in FAILED. `on_step_error(name, error)` is told about
+    every failed step.
+    """
+
+    def __init__(self, steps, max_step_retries=2, on_transition=None, on_step_error=None):
+        self.steps = steps
+        self.max_step_retries = max_step_retries
+        self.on_transition = on_transition
+        self.on_step_error = on_step_error
+        self.state = START
+        self.history = []
+
+    def transition(self, new_state):
+        old_state = self.state
+        self.state = new_state
+        self.history.append((time.time(), old_state, new_state))
+        logger.info(f"Purchase state: {old_state} -> {new_state}")
+        if self.on_transition:
+            self.on_transition(old_state, new_state)
+
+    def reset(self, state=START):
+        if self.state != state:
+            self.transition(state)
+
+    def run(self):
+        """Advance until DONE or FAILED. Returns True if the purchase flow completed."""
+        failures = 0
+        while self.state not in (DONE, FAILED):
+            name, step = self.steps[self.state]
+            try:
+                next_state = step()
+            except Exception as e:
+                failures += 1
+                if self.on_step_error:
+                    self.on_step_error(name, e)
+                if failures > self.max_step_retries:
+                    logger.error(f"Step {name} failed {failures} times in state {self.state}: {str(e)}")
+                    self.transition(FAILED)
+                    break
+                logger.warning(f"Step {name} failed in state {self.state}, retrying in place "
+                               f"({failures}/{self.max_step_retries}): {str(e)}")
+                continue
+            failures = 0
+            self.transition(next_state)
+        return self.state == DONE
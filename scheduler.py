@@ -0,0 +1,140 @@
+"""
+Sale-time-aware polling scheduler - estimates the offset between our clock and the
+server's from HTTP `Date` headers and concentrates checks around the corrected sale instant.
+"""
+
+import logging
+import time
+from email.utils import parsedate_to_datetime
+
+import urllib3
+
+logger = logging.getLogger(__name__)
+
+
+class ClockOffsetEstimator:
+    """
+    Bounds the server clock offset (server time - local time) from `Date` headers.
+
+    A `Date` header is truncated to the second, so a response stamped D that was sent at
+    local time t0 and received at t1 proves D - t1 < offset < D + 1 - t0. Intersecting the
+    bounds of many samples taken at different sub-second phases narrows the estimate well
+    below the one-second header resolution.
+    """
+
+    def __init__(self):
+        self.lower = None
+        self.upper = None
+        self.samples = 0
+
+    def add_sample(self, date_header, sent_at, received_at):
+        """Feed one response `Date` header with the local wall-clock send/receive times."""
+        if not date_header:
+            return
+        try:
+            server_time = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            return
+
+        lower = server_time - received_at
+        upper = server_time + 1 - sent_at
+        if self.lower is None or lower > self.upper or upper < self.lower:
+            # First sample, or the server clock jumped - start again from this one
+            self.lower, self.upper = lower, upper
+        else:
+            self.lower = max(self.lower, lower)
+            self.upper = min(self.upper, upper)
+        self.samples += 1
+
+    def measure(self, http, url, samples=5, spacing=0.23):
+        """Take a few HEAD samples spread over different sub-second phases."""
+        for i in range(samples):
+            sent_at = time.time()
+            try:
+                response = http.request("HEAD", url, redirect=False)
+            except urllib3.exceptions.HTTPError as e:
+                logger.warning(f"Clock offset sample failed: {str(e)}")
+                continue
+            self.add_sample(response.headers.get("Date"), sent_at, time.time())
+            if i < samples - 1:
+                time.sleep(spacing)
+        if self.samples:
+            logger.info(f"Server clock offset: {self.offset * 1000:+.0f} ms (+/- {self.uncertainty * 1000:.0f} ms, {self.samples} samples)")
+
+    @property
+    def offset(self):
+        if self.lower is None:
+            return 0.0
+        return (self.lower + self.upper) / 2
+
+    @property
+    def uncertainty(self):
+        if self.lower is None:
+            return None
+        return (self.upper - self.lower) / 2
+
+
+class SaleScheduler:
+    """Decides how long to wait before the next check based on the distance to the sale."""
+
+    def __init__(self, sale_time, clock, fast_interval, window_before=10.0, window_after=60.0,
+                 max_interval=30.0, late_interval=0.5):
+        self.sale_time = sale_time  # Server-side epoch timestamp of the sale
+        self.clock = clock
+        self.fast_interval = fast_interval
+        self.window_before = window_before
+        self.window_after = window_after
+        self.max_interval = max_interval
+        self.late_interval = late_interval
+        self.checks = {"far": 0, "window": 0, "late": 0}
+        self.detected_at = None
+
+    @property
+    def local_sale_time(self):
+        """Sale instant expressed on our own clock."""
+        return self.sale_time - self.clock.offset
+
+    def phase(self, now=None):
+        now = time.time() if now is None else now
+        remaining = self.local_sale_time - now
+        if remaining > self.window_before:
+            return "far"
+        if remaining > -self.window_after:
+            return "window"
+        return "late"
+
+    def until_window(self, now=None):
+        """Seconds until the fast-polling window opens (negative once it has)."""
+        now = time.time() if now is None else now
+        return self.local_sale_time - self.window_before - now
+
+    def next_delay(self, now=None):
+        """Seconds to sleep before the next check."""
+        now = time.time() if now is None else now
+        phase = self.phase(now)
+        self.checks[phase] += 1
+        if phase == "window":
+            return self.fast_interval
+        if phase == "late":
+            return self.late_interval
+        # Far from the sale: sleep until the window opens, but wake up regularly
+        # in case the sale starts early or the offset estimate moves
+        return max(self.fast_interval, min(self.max_interval, self.until_window(now)))
+
+    def record_detection(self, now=None):
+        """Remember when availability was first seen and log the timing error report."""
+        if self.detected_at is not None:
+            return
+        self.detected_at = time.time() if now is None else now
+        self.report()
+
+    def report(self):
+        if self.detected_at is None:
+            return
+        server_detected_at = self.detected_at + self.clock.offset
+        error = server_detected_at - self.sale_time
+        uncertainty = self.clock.uncertainty
+        uncertainty_text = f"+/- {uncertainty * 1000:.0f} ms" if uncertainty is not None else "unknown accuracy"
+        logger.info(f"Sale detected {error * 1000:+.0f} ms relative to the corrected sale time "
+                    f"(clock offset {self.clock.offset * 1000:+.0f} ms, {uncertainty_text})")
+        logger.info(f"Checks by phase: {self.checks['far']} far, {self.checks['window']} in window, {self.checks['late']} late")
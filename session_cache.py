@@ -0,0 +1,169 @@
+"""
+Persistent session cache - keeps the authenticated cookies and local storage in an
+encrypted file so a restart can skip the full login flow.
+
+The file is encrypted with keys derived from the account password (scrypt). Only the
+standard library is used: HMAC-SHA256 in counter mode as the keystream and an
+HMAC-SHA256 tag over the ciphertext (encrypt-then-MAC).
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+
+import urllib3
+
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"EFSC1"
+SALT_SIZE = 16
+NONCE_SIZE = 16
+TAG_SIZE = 32
+
+LOCAL_STORAGE_DUMP_JS = """
+    var items = {};
+    for (var i = 0; i < window.localStorage.length; i++) {
+        var key = window.localStorage.key(i);
+        items[key] = window.localStorage.getItem(key);
+    }
+    return items;
+"""
+
+LOCAL_STORAGE_RESTORE_JS = """
+    var items = arguments[0];
+    for (var key in items) {
+        window.localStorage.setItem(key, items[key]);
+    }
+"""
+
+
+def _derive_keys(secret, salt):
+    material = hashlib.scrypt(secret.encode("utf-8"), salt=salt, n=2 ** 14, r=8, p=1, dklen=64)
+    return material[:32], material[32:]
+
+
+def _keystream_xor(key, nonce, data):
+    out = bytearray(len(data))
+    for block, offset in enumerate(range(0, len(data), 32)):
+        pad = hmac.new(key, nonce + block.to_bytes(8, "big"), hashlib.sha256).digest()
+        chunk = data[offset:offset + 32]
+        out[offset:offset + len(chunk)] = bytes(a ^ b for a, b in zip(chunk, pad))
+    return bytes(out)
+
+
+def encrypt(secret, plaintext):
+    salt = os.urandom(SALT_SIZE)
+    nonce = os.urandom(NONCE_SIZE)
+    enc_key, mac_key = _derive_keys(secret, salt)
+    ciphertext = _keystream_xor(enc_key, nonce, plaintext)
+    tag = hmac.new(mac_key, MAGIC + salt + nonce + ciphertext, hashlib.sha256).digest()
+    return MAGIC + salt + nonce + tag + ciphertext
+
+
+def decrypt(secret, blob):
+    """Return the plaintext, or None if the blob is malformed or was not written with this secret."""
+    header = len(MAGIC) + SALT_SIZE + NONCE_SIZE + TAG_SIZE
+    if len(blob) < header or not blob.startswith(MAGIC):
+        return None
+    salt = blob[len(MAGIC):len(MAGIC) + SALT_SIZE]
+    nonce = blob[len(MAGIC) + SALT_SIZE:len(MAGIC) + SALT_SIZE + NONCE_SIZE]
+    tag = blob[len(MAGIC) + SALT_SIZE + NONCE_SIZE:header]
+    ciphertext = blob[header:]
+    enc_key, mac_key = _derive_keys(secret, salt)
+    expected = hmac.new(mac_key, MAGIC + salt + nonce + ciphertext, hashlib.sha256).digest()
+    if not hmac.compare_digest(tag, expected):
+        return None
+    return _keystream_xor(enc_key, nonce, ciphertext)
+
+
+class SessionCache:
+    """Saves and restores the logged-in browser state in an encrypted file."""
+
+    def __init__(self, path, secret):
+        self.path = path
+        self.secret = secret
+
+    def save(self, driver):
+        state = capture_session(driver)
+        blob = encrypt(self.secret, json.dumps(state).encode("utf-8"))
+        atomic_write(self.path, blob, permissions=0o600)
+        logger.info(f"Saved session with {len(state['cookies'])} cookies to {self.path}")
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        plaintext = decrypt(self.secret, blob)
+        if plaintext is None:
+            logger.warning(f"Session cache {self.path} could not be decrypted - ignoring it")
+            return None
+        return json.loads(plaintext)
+
+    def restore(self, driver, origin_url, state=None):
+        """Put cached (or already loaded) cookies and local storage back into the driver. Returns the state."""
+        state = state or self.load()
+        if not state:
+            return None
+        restored = inject_session(driver, origin_url, state)
+        age = (time.time() - state["saved_at"]) / 60
+        logger.info(f"Restored {restored} cookies from a session saved {age:.0f} minutes ago")
+        return state
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def capture_session(driver):
+    """Cookies and local storage of the driver's current session."""
+    return {
+        "saved_at": time.time(),
+        "url": driver.current_url,
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script(LOCAL_STORAGE_DUMP_JS),
+    }
+
+
+def inject_session(driver, origin_url, state):
+    """Put captured cookies and local storage into a driver. Returns the number of cookies set."""
+    # Cookies can only be set for the domain of the current page
+    driver.get(origin_url)
+    now = time.time()
+    restored = 0
+    for cookie in state["cookies"]:
+        if cookie.get("expiry") and cookie["expiry"] < now:
+            continue
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except Exception as e:
+            logger.warning(f"Could not restore cookie {cookie.get('name')}: {str(e)}")
+    driver.execute_script(LOCAL_STORAGE_RESTORE_JS, state.get("local_storage") or {})
+    return restored
+
+
+def is_logged_in(http, login_url, cookies, user_agent=None):
+    """One cheap request: a logged-in session is redirected away from the login page."""
+    headers = {"Cookie": "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)}
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    try:
+        response = http.request("GET", login_url, headers=headers, redirect=False)
+    except urllib3.exceptions.HTTPError as e:
+        logger.warning(f"Session check failed: {str(e)}")
+        return False
+
+    if 300 <= response.status < 400:
+        return "login" not in response.headers.get("Location", "").lower()
+    if response.status == 200:
+        return "logout" in response.data.decode("utf-8", errors="replace").lower()
+    return False
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Local Eventfrog stand-in server - mimics the pages the ticket buyer walks through
+so changes to main.py can be measured without touching the live site.
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_TICKET_TYPE = "RAVE THE WAVE mit DJ SCHIFFJANONE (Ab 18J)"
+DEFAULT_SALE_DATE = "13.04.2025 19:00"
+
+EVENT_PATH = "/en/p/concert/chilbi-gersau-partyboot-2025.html"
+LOGIN_PATH = "/en/login.html"
+ACCOUNT_PATH = "/en/account.html"
+INVENTORY_PATH = "/api/events/chilbi-gersau-partyboot-2025/tickets"
+CONTROL_PATH = "/__standin/sale"
+FAULTS_PATH = "/__standin/faults"
+TRACKER_PATH = "/tracker/analytics.js"
+
+# Static assets referenced by every page, with their size in bytes, so page loads
+# cost roughly what they cost on the real site
+ASSETS = {
+    "/assets/site.css": ("text/css", None),
+    "/assets/brand.woff2": ("font/woff2", 60_000),
+    "/assets/hero.jpg": ("image/jpeg", 350_000),
+    "/assets/logo.png": ("image/png", 25_000),
+    TRACKER_PATH: ("application/javascript", 90_000),
+}
+ASSET_DELAY = 0.05  # Simulated network latency per asset request in seconds
+
+SITE_CSS = """@font-face { font-family: Brand; src: url(/assets/brand.woff2) format("woff2"); }
+body { font-family: Brand, sans-serif; margin: 0 auto; max-width: 960px; }
+"""
+
+# The event page loads its ticket inventory like the real site does, after the HTML
+INVENTORY_FETCH_JS = f"""<script>
+fetch("{INVENTORY_PATH}").then(function (r) {{ return r.json(); }})
+  .then(function (data) {{ document.body.setAttribute("data-inventory", data.ticketTypes.length); }});
+</script>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title} | Eventfrog (stand-in)</title>{head_assets}</head>
+<body>
+{body_assets}
+<div id="cookie-banner">
+  <span>We use cookies.</span>
+  <button class="accept" onclick="document.getElementById('cookie-banner').remove()">Accept</button>
+</div>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+class StandInServer:
+    """Threaded HTTP server serving the event, login, cart, checkout and confirm pages."""
+
+    def __init__(self, host="127.0.0.1", port=0, ticket_type=DEFAULT_TICKET_TYPE,
+                 sale_date=DEFAULT_SALE_DATE, max_quantity=3, assets=True, seed=None, asset_max_age=None):
+        self.ticket_type = ticket_type
+        self.assets = assets
+        # None serves assets uncacheable, so every page load pays for them; seconds serve them like hashed bundles
+        self.asset_max_age = asset_max_age
+        self.sale_date = sale_date
+        self.max_quantity = max_quantity
+        self.sale_opens_at = None
+        self.sessions = {}
+        self.faults = {}
+        self.recent_requests = deque()
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(StandInRequestHandler):
+            standin = server
+
+        return Handler
+
+    # Lifecycle
+
+    def start(self):
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # URLs
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def event_url(self):
+        return self.base_url + EVENT_PATH
+
+    @property
+    def login_url(self):
+        return self.base_url + LOGIN_PATH
+
+    @property
+    def third_party_url(self):
+        """Same server under a different host name, standing in for third-party trackers."""
+        port = self.httpd.server_address[1]
+        return f"http://localhost:{port}"
+
+    # Sale switch
+
+    def open_sale_at(self, when):
+        """Open the sale at the given epoch timestamp (None closes it again)."""
+        with self._lock:
+            self.sale_opens_at = when
+
+    def open_sale_in(self, seconds):
+        """Open the sale `seconds` from now and return the flip timestamp."""
+        when = time.time() + seconds
+        self.open_sale_at(when)
+        return when
+
+    def close_sale(self):
+        self.open_sale_at(None)
+
+    @property
+    def sale_open(self):
+        with self._lock:
+            opens_at = self.sale_opens_at
+        return opens_at is not None and time.time() >= opens_at
+
+    # Fault injection
+
+    def set_faults(self, error_rate=0.0, error_status=503, latency=0.0, capacity=None, retry_after=None):
+        """
+        Make the event page and the inventory API misbehave like an overloaded site.
+
+        `error_rate` of the requests fail with `error_status`; every request is delayed by
+        `latency` seconds, scaled up with the request rate of the last second relative to
+        `capacity` (requests per second). Above `capacity` requests are answered with 429,
+        with a Retry-After header if `retry_after` is set.
+        """
+        with self._lock:
+            self.faults = {"error_rate": error_rate, "error_status": error_status, "latency": latency,
+                           "capacity": capacity, "retry_after": retry_after}
+
+    def clear_faults(self):
+        with self._lock:
+            self.faults = {}
+
+    def fault_for_request(self):
+        """Decide how the next faultable request is answered: (delay in seconds, error status or None, headers)."""
+        now = time.monotonic()
+        with self._lock:
+            self.recent_requests.append(now)
+            while self.recent_requests[0] < now - 1.0:
+                self.recent_requests.popleft()
+            faults = self.faults
+            if not faults:
+                return 0.0, None, {}
+            rate = len(self.recent_requests)
+            capacity = faults["capacity"]
+            load = rate / capacity if capacity else 0.0
+            delay = faults["latency"] * (1 + load)
+            headers = {"Retry-After": str(faults["retry_after"])} if faults["retry_after"] is not None else {}
+            if capacity and rate > capacity:
+                return delay, 429, headers
+            if self.rng.random() < faults["error_rate"]:
+                return delay, faults["error_status"], headers
+        return delay, None, {}
+
+    # Pages
+
+    def render(self, title, body):
+        head_assets = body_assets = ""
+        if self.assets:
+            head_assets = (
+                '<link rel="stylesheet" href="/assets/site.css">'
+                f'<script async src="{self.third_party_url}{TRACKER_PATH}"></script>'
+            )
+            body_assets = '<img src="/assets/logo.png" alt="Eventfrog"><img src="/assets/hero.jpg" alt="">'
+        return PAGE_TEMPLATE.format(title=html.escape(title), body=body,
+                                    head_assets=head_assets, body_assets=body_assets)
+
+    def event_page(self, error=None):
+        if not self.sale_open:
+            body = f"""
+<h1>Chilbi Gersau - Partyboot 2025</h1>
+<div class="sale-status">Ticket sale online starts on {html.escape(self.sale_date)}</div>
+"""
+        else:
+            error_html = f'<div class="alert">{html.escape(error)}</div>' if error else ""
+            body = f"""
+<h1>Chilbi Gersau - Partyboot 2025</h1>
+{error_html}
+<button type="button" onclick="document.getElementById('tickets').scrollIntoView()">Buy tickets</button>
+<form id="tickets" method="post" action="/cart">
+  <div class="ticket-row">
+    <div class="ticket-name">{html.escape(self.ticket_type)}</div>
+    <input type="number" name="quantity" min="1" max="{self.max_quantity}" value="1">
+  </div>
+  <button type="submit">Add to cart</button>
+</form>
+"""
+        return self.render("Event", body + INVENTORY_FETCH_JS)
+
+    def inventory(self):
+        """Ticket inventory as the event page's API would return it."""
+        sale_open = self.sale_open
+        return {
+            "event": {"name": "Chilbi Gersau - Partyboot 2025", "saleStart": self.sale_date},
+            "ticketTypes": [
+                {"id": 1, "name": "Early Bird", "status": "sold_out", "remaining": 0},
+                {"id": 2, "name": self.ticket_type, "status": "available" if sale_open else "presale",
+                 "remaining": 250 if sale_open else 0, "maxPerOrder": self.max_quantity},
+            ],
+        }
+
+    def login_page(self, error=None):
+        error_html = f'<div class="error">{html.escape(error)}</div>' if error else ""
+        body = f"""
+<h1>Login</h1>
+{error_html}
+<form method="post" action="/en/login.html">
+  <input id="username" name="username" type="text">
+  <input id="password" name="password" type="password">
+  <button id="submit" type="submit">Log in</button>
+</form>
+"""
+        return self.render("Login", body)
+
+    def account_page(self, email):
+        body = f"""
+<h1>My Account</h1>
+<p>{html.escape(email)}</p>
+<a href="/en/logout.html">Logout</a>
+"""
+        return self.render("Account", body)
+
+    def cart_page(self, quantity):
+        body = f"""
+<h1>Cart</h1>
+<p>{quantity} x {html.escape(self.ticket_type)}</p>
+<form method="get" action="/checkout">
+  <button type="submit">Checkout</button>
+</form>
+"""
+        return self.render("Cart", body)
+
+    def checkout_page(self, email):
+        body = f"""
+<h1>Checkout</h1>
+<form method="get" action="/confirm">
+  <input id="email" name="email" type="email" value="{html.escape(email)}">
+  <button type="submit">Continue</button>
+</form>
+"""
+        return self.render("Checkout", body)
+
+    def confirm_page(self, quantity):
+        body = f"""
+<h1>Confirm</h1>
+<p>{quantity} x {html.escape(self.ticket_type)}</p>
+<label><input type="checkbox" name="terms"> I accept the terms and conditions</label>
+<button type="button">Complete purchase</button>
+"""
+        return self.render("Confirm", body)
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    standin = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep the benchmark output readable
+        pass
+
+    # Helpers
+
+    def _session(self):
+        cookie = self.headers.get("Cookie", "")
+        for part in cookie.split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "standin_session" and value in self.standin.sessions:
+                return value, self.standin.sessions[value]
+        return None, None
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length).decode("utf-8") if length else ""
+        return {key: values[0] for key, values in parse_qs(data).items()}
+
+    def _send_html(self, content, status=200, headers=None):
+        payload = content.encode("utf-8")
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if status == 200 and self.command in ("GET", "HEAD") and self.headers.get("If-None-Match") == etag:
+            # Conditional request for an unchanged page
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _send_json(self, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _send_asset(self, path):
+        content_type, size = ASSETS[path]
+        payload = SITE_CSS.encode("utf-8") if size is None else b"\0" * size
+        time.sleep(ASSET_DELAY)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        max_age = self.standin.asset_max_age
+        self.send_header("Cache-Control", f"public, max-age={max_age}" if max_age is not None else "no-store")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _send_fault(self):
+        """Answer like an overloaded server if faults are injected. Returns True if the request was handled."""
+        delay, status, headers = self.standin.fault_for_request()
+        if delay:
+            time.sleep(delay)
+        if status is None:
+            return False
+        title = "Too Many Requests" if status == 429 else "Service Unavailable"
+        self._send_html(self.standin.render(title, f"<h1>{title}</h1>"), status=status, headers=headers)
+        return True
+
+    def _redirect(self, location, headers=None):
+        self.send_response(303)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    # Routing
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        session_id, session = self._session()
+
+        if url.path in ASSETS:
+            self._send_asset(url.path)
+        elif url.path in (EVENT_PATH, INVENTORY_PATH) and self._send_fault():
+            pass
+        elif url.path == EVENT_PATH:
+            self._send_html(self.standin.event_page())
+        elif url.path == INVENTORY_PATH:
+            self._send_json(self.standin.inventory())
+        elif url.path == LOGIN_PATH:
+            if session:
+                self._redirect(ACCOUNT_PATH)
+            else:
+                self._send_html(self.standin.login_page())
+        elif url.path == ACCOUNT_PATH:
+            if not session:
+                self._redirect(LOGIN_PATH)
+            else:
+                self._send_html(self.standin.account_page(session["email"]))
+        elif url.path == "/cart" and session:
+            self._send_html(self.standin.cart_page(session.get("quantity", 0)))
+        elif url.path == "/checkout" and session and session.get("quantity"):
+            self._send_html(self.standin.checkout_page(session["email"]))
+        elif url.path == "/confirm" and session and session.get("quantity"):
+            self._send_html(self.standin.confirm_page(session["quantity"]))
+        elif url.path in ("/cart", "/checkout", "/confirm"):
+            self._redirect(LOGIN_PATH)
+        else:
+            self._send_html(self.standin.render("Not found", "<h1>Not found</h1>"), status=404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        session_id, session = self._session()
+
+        if url.path == LOGIN_PATH:
+            form = self._form()
+            if not form.get("username") or not form.get("password"):
+                self._send_html(self.standin.login_page("Invalid email or password"))
+                return
+            session_id = f"s{time.monotonic_ns()}"
+            self.standin.sessions[session_id] = {"email": form["username"]}
+            self._redirect(ACCOUNT_PATH, {"Set-Cookie": f"standin_session={session_id}; Path=/"})
+        elif url.path == "/cart":
+            if not session or not self.standin.sale_open:
+                self._redirect(EVENT_PATH)
+                return
+            quantity = int(self._form().get("quantity") or 1)
+            if quantity > self.standin.max_quantity:
+                self._send_html(self.standin.event_page(f"A maximum of {self.standin.max_quantity} tickets per order is allowed"))
+                return
+            session["quantity"] = quantity
+            self._redirect("/cart")
+        elif url.path == CONTROL_PATH:
+            self._control(parse_qs(url.query))
+        elif url.path == FAULTS_PATH:
+            self._control_faults(parse_qs(url.query))
+        else:
+            self._send_html(self.standin.render("Not found", "<h1>Not found</h1>"), status=404)
+
+    def _control(self, query):
+        """Scriptable sale switch: POST /__standin/sale?in=<seconds> | ?at=<epoch> | ?close=1"""
+        if "close" in query:
+            self.standin.close_sale()
+        elif "at" in query:
+            self.standin.open_sale_at(float(query["at"][0]))
+        elif "in" in query:
+            self.standin.open_sale_in(float(query["in"][0]))
+        self._send_json({"sale_opens_at": self.standin.sale_opens_at, "sale_open": self.standin.sale_open})
+
+    def _control_faults(self, query):
+        """Fault switch: POST /__standin/faults?error_rate=&status=&latency=&capacity=&retry_after= | ?clear=1"""
+        if "clear" in query:
+            self.standin.clear_faults()
+        else:
+            def number(name, default=None, kind=float):
+                return kind(query[name][0]) if name in query else default
+
+            self.standin.set_faults(number("error_rate", 0.0), number("status", 503, int), number("latency", 0.0),
+                                    number("capacity"), number("retry_after"))
+        self._send_json({"faults": self.standin.faults})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Eventfrog stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--open-in", type=float, default=None, help="Open the sale this many seconds after start")
+    parser.add_argument("--max-quantity", type=int, default=3)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of event page requests answered with 503")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency of the event page in seconds")
+    parser.add_argument("--capacity", type=float, default=None,
+                        help="Requests per second before latency climbs and requests get 429")
+    parser.add_argument("--asset-max-age", type=int, default=None,
+                        help="Serve static assets as cacheable for this many seconds (default: uncacheable)")
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, max_quantity=args.max_quantity, asset_max_age=args.asset_max_age)
+    if args.open_in is not None:
+        server.open_sale_in(args.open_in)
+    if args.error_rate or args.latency or args.capacity:
+        server.set_faults(args.error_rate, latency=args.latency, capacity=args.capacity, retry_after=1)
+    print(f"Stand-in event page: {server.event_url}")
+    print(f"Stand-in login page: {server.login_url}")
+    print(f"Sale switch: POST {server.base_url}{CONTROL_PATH}?in=<seconds>")
+    print(f"Fault switch: POST {server.base_url}{FAULTS_PATH}?error_rate=<0..1>&latency=<seconds>&capacity=<rps>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Parallel cold start - Chrome launch, DNS and TLS warm-up and the session preload run
+side by side instead of one after another, and every stage is timed.
+"""
+
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records when each startup stage began and how long it took, relative to the start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    def _record(self, name, start, duration, ok):
+        with self._lock:
+            self.stages.append({"stage": name, "start": start - self.started, "duration": duration, "ok": ok})
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(name, start, time.perf_counter() - start, ok)
+
+    def mark(self, name):
+        """Record a point in time, e.g. the first availability check."""
+        self._record(name, time.perf_counter(), 0.0, True)
+
+    def since_start(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Log the per-stage breakdown, ordered by start time."""
+        with self._lock:
+            stages = sorted(self.stages, key=lambda stage: stage["start"])
+        for stage in stages:
+            status = "" if stage["ok"] else " (failed)"
+            logger.info(f"Startup {stage['stage']}: {stage['duration'] * 1000:.0f} ms "
+                        f"at +{stage['start'] * 1000:.0f} ms{status}")
+        logger.info(f"Startup finished after {self.since_start() * 1000:.0f} ms")
+
+
+def run_parallel(timer, stages):
+    """
+    Run `{name: callable}` in parallel threads, each as a timed stage, and wait for all.
+    Returns `{name: result}`; a failed stage's result is its exception.
+    """
+    def run_stage(name, func):
+        with timer.stage(name):
+            return func()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(run_stage, name, func) for name, func in stages.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+    return results
+
+
+def warm_up_connection(timer, http, url):
+    """Resolve the host and open a keep-alive TLS connection that stays in the pool for later requests."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    with timer.stage("dns"):
+        socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    with timer.stage("connect"):
+        http.request("HEAD", url, redirect=False)
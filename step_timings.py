@@ -0,0 +1,92 @@
+"""
+Learned step timeouts - records how long each purchase step waited for its elements and
+outcomes in past runs and derives the timeouts from the measured percentiles instead of
+fixed numbers. A timeout only matters when something went wrong (the waits resolve the
+moment the element appears), so a tuned one gets a failed step retried sooner.
+"""
+
+import json
+import logging
+import os
+import time
+
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+MAX_SAMPLES = 200  # Latest samples kept per step and phase
+MIN_SAMPLES = 10  # Samples needed before a timeout is derived from them
+TIMEOUT_PERCENTILE = 99
+TIMEOUT_FACTOR = 3.0  # Headroom over the percentile - sale-time servers are slower than on a quiet day
+MIN_TIMEOUT = 1.0
+SAVE_INTERVAL = 5.0
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples, None if there are none."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class StepTimings:
+    """Latency samples per `step/phase`, persisted across runs."""
+
+    def __init__(self, path="step_timings.json"):
+        self.path = path
+        self.samples = self._load()
+        self.escalation = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable step timings {self.path}: {str(e)}")
+            return {}
+
+    def save(self, force=True):
+        if not self.path or not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        try:
+            atomic_write(self.path, json.dumps(self.samples, indent=2, sort_keys=True))
+        except OSError as e:
+            logger.warning(f"Error saving step timings {self.path}: {str(e)}")
+            return
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def record(self, step, phase, seconds):
+        key = f"{step}/{phase}"
+        samples = self.samples.setdefault(key, [])
+        samples.append(round(seconds, 4))
+        del samples[:-MAX_SAMPLES]
+        self.escalation.pop(key, None)
+        self._dirty = True
+
+    def timed_out(self, step, phase):
+        """Double the timeout of the next try after a wait ran out - a slow day must not fail every retry."""
+        key = f"{step}/{phase}"
+        self.escalation[key] = self.escalation.get(key, 0) + 1
+
+    def timeout(self, step, phase, limit):
+        """Timeout for a wait: `limit` until MIN_SAMPLES were measured, then the scaled percentile, capped at `limit`."""
+        key = f"{step}/{phase}"
+        samples = self.samples.get(key, [])
+        if len(samples) < MIN_SAMPLES:
+            return limit
+        learned = max(MIN_TIMEOUT, percentile(samples, TIMEOUT_PERCENTILE) * TIMEOUT_FACTOR)
+        return min(limit, learned * 2 ** self.escalation.get(key, 0))
+
+    def summary(self):
+        """p50/p99 in seconds and sample count per `step/phase`."""
+        return {key: {"p50": percentile(samples, 50), "p99": percentile(samples, 99), "samples": len(samples)}
+                for key, samples in sorted(self.samples.items()) if samples}
@@ -0,0 +1,139 @@
+"""
+Timing spans for the ticket buyer - records wall time per phase, how much of it was
+spent in WebDriver round-trips, and exports the result as a Chrome trace timeline.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from selenium.webdriver.remote.command import Command
+
+from waits import WAIT_SCRIPTS
+
+logger = logging.getLogger(__name__)
+
+# Check spans arrive at 10 Hz while waiting for the sale - keep only the recent ones
+MAX_TRACE_EVENTS = 20000
+
+
+class Tracer:
+    """Collects timing spans and WebDriver round-trip statistics for one process."""
+
+    def __init__(self, output_dir="traces"):
+        self.output_dir = output_dir
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)
+        self.rpc_seconds = 0.0
+        self.rpc_count = 0
+        self.dom_wait_seconds = 0.0
+        self.dom_wait_count = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._exports = 0
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1_000_000
+
+    def instrument(self, driver):
+        """
+        Wrap driver.execute so every WebDriver command is counted as a round-trip - except the
+        DomWaiter's wait scripts, which mostly wait in the page and are counted as DOM waits.
+        """
+        original_execute = driver.execute
+
+        @functools.wraps(original_execute)
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                elapsed = time.perf_counter() - start
+                dom_wait = (driver_command == Command.W3C_EXECUTE_SCRIPT_ASYNC and params is not None
+                            and params.get("script") in WAIT_SCRIPTS)
+                with self._lock:
+                    if dom_wait:
+                        self.dom_wait_seconds += elapsed
+                        self.dom_wait_count += 1
+                    else:
+                        self.rpc_seconds += elapsed
+                        self.rpc_count += 1
+
+        driver.execute = execute
+        return driver
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time a block, splitting its wall time into WebDriver round-trips and waiting."""
+        start_us = self._now_us()
+        with self._lock:
+            rpc_seconds_start = self.rpc_seconds
+            rpc_count_start = self.rpc_count
+            dom_wait_seconds_start = self.dom_wait_seconds
+            dom_wait_count_start = self.dom_wait_count
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end_us = self._now_us()
+            with self._lock:
+                rpc_ms = (self.rpc_seconds - rpc_seconds_start) * 1000
+                rpc_calls = self.rpc_count - rpc_count_start
+                dom_wait_ms = (self.dom_wait_seconds - dom_wait_seconds_start) * 1000
+                dom_waits = self.dom_wait_count - dom_wait_count_start
+            wall_ms = (end_us - start_us) / 1000
+            event_args = dict(args)
+            event_args.update({
+                "wall_ms": round(wall_ms, 3),
+                "webdriver_ms": round(rpc_ms, 3),
+                "webdriver_calls": rpc_calls,
+                "wait_ms": round(max(wall_ms - rpc_ms, 0.0), 3),
+                "dom_wait_ms": round(dom_wait_ms, 3),
+                "dom_waits": dom_waits,
+            })
+            if error:
+                event_args["error"] = error
+            self.events.append({
+                "name": name,
+                "cat": "buyer",
+                "ph": "X",
+                "ts": round(start_us, 3),
+                "dur": round(end_us - start_us, 3),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": event_args,
+            })
+            logger.debug(f"Span {name}: {wall_ms:.1f} ms ({rpc_ms:.1f} ms WebDriver, {rpc_calls} calls)")
+
+    def export(self, label="attempt"):
+        """Write the collected spans as a Chrome trace JSON file and start a new timeline."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._exports += 1
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.output_dir, f"{label}-{timestamp}-{self._exports}.json")
+        with self._lock:
+            events = list(self.events)
+            self.events.clear()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logger.info(f"Wrote timeline with {len(events)} spans to {path}")
+        return path
+
+
+def traced(name):
+    """Decorator running an EventfrogTicketBuyer method inside a span on self.tracer."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
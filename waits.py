@@ -0,0 +1,173 @@
+"""
+Event-driven DOM waits - a MutationObserver injected through execute_async_script
+resolves the moment an element appears, disappears or the page navigates, instead of
+polling with one WebDriver round-trip every 500 ms.
+"""
+
+import logging
+import time
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single async script; each wait enforces its own timeout in the page
+SCRIPT_TIMEOUT = 120
+
+WAIT_FOR_ELEMENT_JS = """
+    var xpaths = arguments[0], condition = arguments[1], timeoutMs = arguments[2];
+    var done = arguments[arguments.length - 1];
+
+    function usable(el) {
+        if (condition === 'present') return true;
+        var visible = !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+        if (condition === 'visible' || condition === 'gone') return visible;
+        return visible && !el.disabled;
+    }
+
+    function find() {
+        for (var i = 0; i < xpaths.length; i++) {
+            var result = document.evaluate(xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < result.snapshotLength; j++) {
+                var el = result.snapshotItem(j);
+                if (usable(el)) return [i, el];
+            }
+        }
+        return null;
+    }
+
+    function check() {
+        var hit = find();
+        if (condition === 'gone') return hit ? null : [-1, null];
+        return hit;
+    }
+
+    var hit = check();
+    if (hit) { done(hit); return; }
+
+    var finished = false, observer, timer;
+    function finish(value) {
+        if (finished) return;
+        finished = true;
+        if (observer) observer.disconnect();
+        clearTimeout(timer);
+        window.removeEventListener('pagehide', onHide);
+        done(value);
+    }
+    function onHide() { finish('navigating'); }
+
+    observer = new MutationObserver(function () {
+        var hit = check();
+        if (hit) finish(hit);
+    });
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    window.addEventListener('pagehide', onHide);
+    timer = setTimeout(function () { finish(null); }, timeoutMs);
+"""
+
+WAIT_FOR_NAVIGATION_JS = """
+    var startUrl = arguments[0], timeoutMs = arguments[1];
+    var done = arguments[arguments.length - 1];
+    if (location.href !== startUrl) { done(location.href); return; }
+
+    var finished = false, interval, timer;
+    function finish(value) {
+        if (finished) return;
+        finished = true;
+        clearInterval(interval);
+        clearTimeout(timer);
+        window.removeEventListener('pagehide', onHide);
+        done(value);
+    }
+    function onHide() { finish('navigating'); }
+
+    window.addEventListener('pagehide', onHide);
+    // Catches history.pushState changes that never unload the page
+    interval = setInterval(function () {
+        if (location.href !== startUrl) finish(location.href);
+    }, 20);
+    timer = setTimeout(function () { finish(null); }, timeoutMs);
+"""
+
+
+# Scripts that spend their time waiting in the page rather than on the round-trip; the
+# tracer counts them as waiting so the WebDriver share of a span stays meaningful
+WAIT_SCRIPTS = frozenset((WAIT_FOR_ELEMENT_JS, WAIT_FOR_NAVIGATION_JS))
+
+
+def xpath_literal(text):
+    """Quote text for use inside an XPath expression, even if it contains both quote types."""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+class DomWaiter:
+    """Waits on the page itself instead of polling it from Python."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        driver.set_script_timeout(SCRIPT_TIMEOUT)
+
+    def _run(self, script, *args, timeout):
+        """Run a wait script, re-arming it on the new document if the page navigates meanwhile."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            try:
+                result = self.driver.execute_async_script(script, *args, remaining_ms)
+            except JavascriptException as e:
+                # The document was unloaded while the script was waiting
+                logger.debug(f"Wait script interrupted: {e.msg}")
+                result = "navigating"
+            if result != "navigating":
+                return result
+            if time.monotonic() >= deadline:
+                return None
+
+    def first(self, xpaths, timeout=10, condition="present"):
+        """
+        Wait until any of the XPaths matches an element satisfying `condition`
+        ("present", "visible" or "clickable"). Returns (index of the XPath, element).
+        """
+        if isinstance(xpaths, str):
+            xpaths = [xpaths]
+        result = self._run(WAIT_FOR_ELEMENT_JS, list(xpaths), condition, timeout=timeout)
+        if not result:
+            raise TimeoutException(f"Timed out after {timeout}s waiting for {condition} element: {' | '.join(xpaths)}")
+        return result[0], result[1]
+
+    def element(self, xpaths, timeout=10, condition="present"):
+        return self.first(xpaths, timeout, condition)[1]
+
+    def clickable(self, xpaths, timeout=10):
+        return self.element(xpaths, timeout, "clickable")
+
+    def text(self, text, timeout=10):
+        """Wait until an element whose own text contains `text` appears."""
+        return self.element(f"//*[contains(text(), {xpath_literal(text)})]", timeout)
+
+    def gone(self, xpaths, timeout=10):
+        """Wait until none of the XPaths matches a visible element."""
+        if isinstance(xpaths, str):
+            xpaths = [xpaths]
+        result = self._run(WAIT_FOR_ELEMENT_JS, list(xpaths), "gone", timeout=timeout)
+        if not result:
+            raise TimeoutException(f"Timed out after {timeout}s waiting for element to disappear: {' | '.join(xpaths)}")
+
+    def navigation(self, from_url=None, timeout=10):
+        """Wait until the page unloads or its URL changes. Returns once the new page can be queried."""
+        from_url = from_url or self.driver.current_url
+        try:
+            result = self.driver.execute_async_script(WAIT_FOR_NAVIGATION_JS, from_url, int(timeout * 1000))
+        except (JavascriptException, WebDriverException) as e:
+            logger.debug(f"Navigation wait interrupted: {e.msg}")
+            result = "navigating"
+        if result is None:
+            raise TimeoutException(f"Timed out after {timeout}s waiting to leave {from_url}")
+        # After an unload, wait for the next document before handing back control
+        self.element("//body", timeout)
+        return self.driver.current_url
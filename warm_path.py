@@ -0,0 +1,236 @@
+"""
+Pre-sale warm path - while the sale is still closed, record the structure of the ticket
+row (stable ids of the row and its quantity input, and how far up the row the input
+sits) and pull the static assets of the cart and checkout pages into Chrome's HTTP
+cache. At the flip, the ticket is then selected with a single script call and the
+checkout pages render from a warm cache.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from selenium.webdriver.common.by import By
+
+from waits import xpath_literal
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVELS = 4  # Ancestors of the ticket row searched for its quantity input
+MAX_ASSETS = 60  # Assets fetched per warm-up, so a page with a huge gallery can't stall the driver
+STABLE_ATTRIBUTES = ("data-ticket-id", "data-ticket-type-id", "data-id", "name")
+
+ROW_STRUCTURE_JS = """
+    var row = arguments[0], quantityXpaths = arguments[1], maxLevels = arguments[2], attributes = arguments[3];
+
+    function identity(el) {
+        var found = {tag: el.tagName.toLowerCase(), id: el.id || null, attribute: null, value: null};
+        for (var i = 0; i < attributes.length; i++) {
+            var value = el.getAttribute(attributes[i]);
+            // Only an attribute that identifies this one element (every ticket row has a name="quantity")
+            if (value && document.querySelectorAll('[' + attributes[i] + '="' + CSS.escape(value) + '"]').length === 1) {
+                found.attribute = attributes[i];
+                found.value = value;
+                break;
+            }
+        }
+        return found;
+    }
+
+    function quantityIn(scope) {
+        for (var i = 0; i < quantityXpaths.length; i++) {
+            var el = document.evaluate('.' + quantityXpaths[i], scope, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (el) return el;
+        }
+        return null;
+    }
+
+    var scope = row, levels = 0, quantity = null;
+    while (scope && levels <= maxLevels) {
+        quantity = quantityIn(scope);
+        if (quantity) break;
+        scope = scope.parentElement;
+        levels++;
+    }
+    return {row: identity(row), quantity: quantity ? identity(quantity) : null, levels: quantity ? levels : null};
+"""
+
+SELECT_TICKET_JS = """
+    var row = arguments[0], quantityXpaths = arguments[1], levels = arguments[2];
+    var maxLevels = arguments[3], wanted = arguments[4];
+
+    function evaluate(xpath, context) {
+        return document.evaluate(xpath, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+
+    row.click();
+    var result = {quantity_found: false, matched: null, quantity_max: null, quantity: null};
+    if (wanted <= 1) return result;
+
+    // Only the row's own input (at the recorded level if known) - never another ticket type's
+    var input = null;
+    var scopes = [];
+    var scope = row;
+    for (var level = 0; scope && level <= maxLevels; level++) {
+        if (levels === null || level === levels) scopes.push(scope);
+        scope = scope.parentElement;
+    }
+    for (var s = 0; !input && s < scopes.length; s++) {
+        for (var i = 0; i < quantityXpaths.length; i++) {
+            input = evaluate('.' + quantityXpaths[i], scopes[s]);
+            if (input) {
+                result.matched = i;
+                break;
+            }
+        }
+    }
+    if (!input) return result;
+    result.quantity_found = true;
+
+    if (input.tagName === 'SELECT') {
+        for (var k = 0; k < input.options.length; k++) {
+            var option = parseInt(input.options[k].value, 10);
+            if (!isNaN(option) && (result.quantity_max === null || option > result.quantity_max)) result.quantity_max = option;
+        }
+    } else if (input.getAttribute('max')) {
+        var max = parseInt(input.getAttribute('max'), 10);
+        if (!isNaN(max)) result.quantity_max = max;
+    }
+    var quantity = wanted;
+    if (result.quantity_max !== null && result.quantity_max > 0 && result.quantity_max < quantity) quantity = result.quantity_max;
+
+    // The native setter plus input/change events, so script-driven forms see the new value
+    var prototype = input.tagName === 'SELECT' ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(input, String(quantity));
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+    result.quantity = quantity;
+    return result;
+"""
+
+PRECACHE_JS = """
+    var pages = arguments[0], maxAssets = arguments[1], deadlineMs = arguments[2];
+    var done = arguments[arguments.length - 1];
+    var selectors = 'link[rel~="stylesheet"][href], link[rel="preload"][href], link[rel="modulepreload"][href], ' +
+                    'script[src], img[src], link[rel~="icon"][href]';
+    var assets = [], seen = {}, pagesLoaded = 0, cached = 0, finished = false;
+    var controller = new AbortController();
+
+    // Whatever is still loading at the deadline is aborted, so a slow server can't hold the driver
+    function finish(result) {
+        if (finished) return;
+        finished = true;
+        clearTimeout(timer);
+        controller.abort();
+        done(result);
+    }
+    var timer = setTimeout(function () {
+        finish({pages: pagesLoaded, assets: assets.length, cached: cached, error: 'deadline of ' + deadlineMs + ' ms reached'});
+    }, deadlineMs);
+
+    function fetchAsset(url) {
+        var sameOrigin = new URL(url).origin === location.origin;
+        var options = sameOrigin ? {credentials: 'same-origin'} : {mode: 'no-cors', credentials: 'omit'};
+        options.signal = controller.signal;
+        return fetch(url, options).then(function (response) {
+            return response.arrayBuffer().then(function () {
+                if (response.ok || response.type === 'opaque') cached++;
+            });
+        });
+    }
+
+    Promise.allSettled(pages.map(function (page) {
+        return fetch(page, {credentials: 'same-origin', signal: controller.signal}).then(function (response) {
+            return response.text().then(function (text) {
+                pagesLoaded++;
+                var doc = new DOMParser().parseFromString(text, 'text/html');
+                doc.querySelectorAll(selectors).forEach(function (el) {
+                    var raw = el.getAttribute('href') || el.getAttribute('src');
+                    var url;
+                    try { url = new URL(raw, response.url).href; } catch (e) { return; }
+                    if (!/^https?:/.test(url) || seen[url] || assets.length >= maxAssets) return;
+                    seen[url] = true;
+                    assets.push(url);
+                });
+            });
+        });
+    })).then(function () {
+        return Promise.allSettled(assets.map(fetchAsset));
+    }).then(function () {
+        finish({pages: pagesLoaded, assets: assets.length, cached: cached});
+    }).catch(function (e) {
+        finish({pages: pagesLoaded, assets: assets.length, cached: cached, error: String(e)});
+    });
+"""
+
+
+@dataclass
+class TicketRowPlan:
+    """Where the ticket row and its quantity input were found on the pre-sale page."""
+    row_xpath: Optional[str]
+    quantity_xpath: Optional[str]
+    levels: Optional[int]
+    recorded_at: float
+
+
+def _stable_xpath(identity):
+    """Exact XPath for an element with an id or a stable attribute, None if it has neither."""
+    if not identity:
+        return None
+    if identity["id"]:
+        return f"//*[@id={xpath_literal(identity['id'])}]"
+    if identity["attribute"]:
+        return f"//{identity['tag']}[@{identity['attribute']}={xpath_literal(identity['value'])}]"
+    return None
+
+
+def record_ticket_row(driver, row, selectors):
+    """Record the structure around a located ticket row in a single WebDriver call."""
+    raw = driver.execute_script(ROW_STRUCTURE_JS, row, selectors.xpaths("quantity_input"), MAX_LEVELS,
+                                list(STABLE_ATTRIBUTES))
+    return TicketRowPlan(
+        row_xpath=_stable_xpath(raw["row"]),
+        quantity_xpath=_stable_xpath(raw["quantity"]),
+        levels=raw["levels"],
+        recorded_at=time.time(),
+    )
+
+
+def select_ticket(driver, row, quantity, selectors, plan=None):
+    """
+    Click the ticket row and set the quantity of the row's own input (capped at its maximum)
+    in a single WebDriver call. Returns a dict with quantity_found, quantity_max and the
+    quantity set; quantity_found is False if no input was found within the row's ancestors.
+    """
+    levels = plan.levels if plan else None
+    result = driver.execute_script(SELECT_TICKET_JS, row, selectors.xpaths("quantity_input"), levels,
+                                   MAX_LEVELS, quantity)
+    if result["matched"] is not None:
+        selectors.record("quantity_input", result["matched"])
+    return result
+
+
+def find_quantity_input(row, selectors):
+    """
+    The ticket row's own quantity input, searched in the row and then up to MAX_LEVELS of
+    its ancestors - never the whole page, where it could be another ticket type's. None if absent.
+    """
+    xpaths = selectors.xpaths("quantity_input")
+    for level in range(MAX_LEVELS + 1):
+        scope = "." if level == 0 else f"./ancestor::*[{level}]"
+        for index, xpath in enumerate(xpaths):
+            found = row.find_elements(By.XPATH, scope + xpath)
+            if found:
+                selectors.record("quantity_input", index)
+                return found[0]
+    return None
+
+
+def precache_assets(driver, page_urls, deadline):
+    """
+    Fetch pages in the browser and pull their stylesheets, scripts and images into Chrome's
+    HTTP cache, giving up after `deadline` seconds. Returns counts of the pages read and the
+    assets found and cached.
+    """
+    return driver.execute_async_script(PRECACHE_JS, list(page_urls), MAX_ASSETS, int(deadline * 1000))
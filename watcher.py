@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Multi-event watcher - one asyncio loop probes every configured event over a shared
+keep-alive HTTP pool and only starts a browser for an event once its sale opens.
+"""
+
+import argparse
+import asyncio
+import logging
+
+import main
+import purchase_flow
+from backoff import AdaptivePolling, CircuitBreaker, PollBackoff
+from events import load_events
+from probe import AvailabilityProbe, create_pool
+from scheduler import ClockOffsetEstimator, SaleScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class EventWatcher:
+    """Watches many events for the same account with one probe loop and a bounded number of browsers."""
+
+    def __init__(self, events, max_browsers=2, max_concurrent_probes=8):
+        self.events = events
+        self.max_browsers = max_browsers
+        self.max_concurrent_probes = max_concurrent_probes
+        # Event pages are public, so the probes share one anonymous keep-alive pool
+        self.http = create_pool(maxsize=max_concurrent_probes)
+        self.clock = ClockOffsetEstimator()
+        # One server answers for all events, so they back off (and pause) together
+        self.polling = AdaptivePolling(
+            PollBackoff(base_delay=main.REFRESH_INTERVAL, max_delay=main.MAX_BACKOFF),
+            CircuitBreaker(main.BREAKER_FAILURES, main.BREAKER_OPEN_TIME, main.BREAKER_MAX_OPEN_TIME),
+        )
+        self.results = {}
+
+    async def run(self):
+        self.probe_slots = asyncio.Semaphore(self.max_concurrent_probes)
+        self.browser_slots = asyncio.Semaphore(self.max_browsers)
+        if self.events:
+            # All events live on the same server, so one clock offset serves them all
+            await asyncio.to_thread(self.clock.measure, self.http, self.events[0].url)
+        await asyncio.gather(*(self.watch(event) for event in self.events))
+        return self.results
+
+    async def watch(self, event):
+        """Probe one event until its sale opens, then hand it to a browser."""
+        probe = AvailabilityProbe(event.url, event.ticket_type, pool=self.http, keep_html=False)
+        sale_datetime = event.sale_datetime()
+        scheduler = None
+        if sale_datetime:
+            scheduler = SaleScheduler(
+                sale_datetime.timestamp(),
+                self.clock,
+                fast_interval=main.REFRESH_INTERVAL,
+                window_before=main.SALE_WINDOW_BEFORE,
+                window_after=main.SALE_WINDOW_AFTER,
+                max_interval=main.MAX_POLL_INTERVAL,
+            )
+        logger.info(f"[{event.name}] Watching {event.url} (sale expected {event.sale_date or 'any time'})")
+
+        while True:
+            async with self.probe_slots:
+                result = await asyncio.to_thread(probe.check)
+            self.clock.add_sample(result.server_date, result.sent_at, result.received_at)
+            overload = self.polling.record("http", result.status, result.elapsed, result.error, result.retry_after)
+
+            if result.available:
+                if scheduler:
+                    scheduler.record_detection()
+                logger.info(f"[{event.name}] Sale is open - assigning a browser")
+                self.results[event.name] = await self.buy(event)
+                return
+            if overload:
+                logger.warning(f"[{event.name}] Server struggling ({overload}) - backing off")
+            elif result.available is None:
+                logger.warning(f"[{event.name}] Probe failed: {result.error}")
+            else:
+                logger.info(f"[{event.name}] Tickets are not yet available ({result.page_status})")
+
+            delay = scheduler.next_delay() if scheduler else main.REFRESH_INTERVAL
+            delay = self.polling.delay(delay)
+            await asyncio.sleep(delay)
+
+    async def buy(self, event):
+        async with self.browser_slots:
+            return await asyncio.to_thread(self._run_buyer, event)
+
+    def _run_buyer(self, event):
+        """Start a browser for the event and run the normal buyer loop in it."""
+        # Buyers run side by side in this process: each gets its own checkpoint file and metrics port
+        index = self.events.index(event)
+        metrics_port = main.METRICS_PORT + index if main.METRICS_PORT is not None else None
+        try:
+            buyer = main.EventfrogTicketBuyer(event, clock=self.clock, instance=event.name, metrics_port=metrics_port)
+        except Exception as e:
+            logger.error(f"[{event.name}] Could not start a browser: {str(e)}")
+            return False
+        buyer.run()
+        purchased = buyer.purchase_state == purchase_flow.DONE
+        logger.info(f"[{event.name}] Purchase {'completed' if purchased else 'failed'}")
+        return purchased
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Watch several Eventfrog events and buy tickets as each sale opens")
+    parser.add_argument("events", help="TOML file with [[events]] entries (see events.example.toml)")
+    parser.add_argument("--max-browsers", type=int, default=2, help="Browsers allowed to run at the same time")
+    parser.add_argument("--max-concurrent-probes", type=int, default=8, help="HTTP probes in flight at the same time")
+    args = parser.parse_args()
+
+    events = load_events(args.events)
+    logger.info(f"Loaded {len(events)} events from {args.events}")
+    watcher = EventWatcher(events, args.max_browsers, args.max_concurrent_probes)
+    try:
+        results = asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        logger.info("Watcher interrupted by user")
+        return
+    for name, purchased in results.items():
+        logger.info(f"{name}: {'purchased' if purchased else 'not purchased'}")
+
+
+if __name__ == "__main__":
+    main_cli()